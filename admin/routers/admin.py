@@ -0,0 +1,143 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from audit.models.audit import AuditLog
+from configs.authentication import get_current_admin
+from configs.conf import settings
+from configs.database import engine, get_db
+from utils.admission import gates
+from utils.audit_log import audit_buffer
+from utils.query_deadline import deadline_stats
+from utils.single_flight import single_flight
+from utils.slow_queries import captures
+
+
+router = APIRouter(
+    prefix= "/admin",
+    tags=["Admin"]
+)
+
+
+@router.get("/admission")
+async def get_admission_stats(
+        current_user = Depends(get_current_admin)
+    ):
+
+    return {
+        "gates": {name: gate.stats() for name, gate in gates.items()},
+        "pool": {
+            "size": engine.pool.size(),
+            "checked_out": engine.pool.checkedout(),
+            "overflow": engine.pool.overflow(),
+            "checked_in": engine.pool.checkedin()
+        }
+    }
+
+
+@router.get("/query-deadlines")
+async def get_query_deadline_stats(
+        current_user = Depends(get_current_admin)
+    ):
+
+    return {
+        "statement_timeout_ms": settings.statement_timeout_ms,
+        **deadline_stats.as_dict()
+    }
+
+
+@router.get("/single-flight")
+async def get_single_flight_stats(
+        current_user = Depends(get_current_admin)
+    ):
+
+    return single_flight.stats()
+
+
+@router.get("/profiles")
+async def get_profiles(
+        current_user = Depends(get_current_admin)
+    ):
+
+    if not os.path.isdir(settings.profiling_dir):
+        return {"profiles": []}
+
+    return {"profiles": sorted(os.listdir(settings.profiling_dir), reverse=True)}
+
+
+@router.get("/profiles/{file_name}")
+async def get_profile(
+        file_name: str,
+        current_user = Depends(get_current_admin)
+    ):
+
+    file_path = os.path.join(settings.profiling_dir, os.path.basename(file_name))
+    if not os.path.isfile(file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy file profile"
+        )
+
+    return FileResponse(file_path)
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+        route: str = None,
+        limit: int = 50,
+        current_user = Depends(get_current_admin)
+    ):
+
+    slow_queries = [capture for capture in reversed(captures) if not route or capture["route"] == route]
+    return {
+        "slow_queries": slow_queries[:limit],
+        "total_data": len(slow_queries)
+    }
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(
+        current_user = Depends(get_current_admin)
+    ):
+
+    captures.clear()
+    return {"message": "Đã xóa danh sách truy vấn chậm"}
+
+
+@router.get("/audit-log")
+async def get_audit_log(
+        entity: str = None,
+        entity_id: int = None,
+        actor_id: int = None,
+        before_id: int = None,
+        limit: int = 50,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_admin)
+    ):
+
+    try:
+        query = db.query(AuditLog)
+        if entity:
+            query = query.filter(AuditLog.entity == entity)
+        if entity_id is not None:
+            query = query.filter(AuditLog.entity_id == entity_id)
+        if actor_id is not None:
+            query = query.filter(AuditLog.actor_id == actor_id)
+        if before_id is not None:
+            query = query.filter(AuditLog.id < before_id)
+
+        entries = query.order_by(AuditLog.id.desc()).limit(limit).all()
+        return {
+            "audit_log": [
+                {column.key: getattr(entry, column.key) for column in AuditLog.__table__.columns}
+                for entry in entries
+            ],
+            "buffer": audit_buffer.stats()
+        }
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
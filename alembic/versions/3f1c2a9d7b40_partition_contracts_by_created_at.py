@@ -0,0 +1,137 @@
+"""partition contracts by created_at
+
+Revision ID: 3f1c2a9d7b40
+Revises: 9c4e1b7a2f60
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b40'
+down_revision: Union[str, None] = '9c4e1b7a2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DEPENDENT_TABLES = ["payments", "contract_balances", "contract_accruals"]
+
+CONTRACT_COLUMNS = "id, contract_number, loan, interest_rate, duration, start_date, daily_payment, period, next_due_date, next_due_amount, created_at, updated_at, change_seq, customer_id"
+
+
+def contract_columns():
+    return [
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('contracts_id_seq')"), nullable=False),
+        sa.Column("contract_number", sa.String(), nullable=False),
+        sa.Column("loan", sa.Integer(), nullable=True),
+        sa.Column("interest_rate", sa.Float(), nullable=True),
+        sa.Column("duration", sa.Integer(), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=True),
+        sa.Column("daily_payment", sa.Integer(), nullable=True),
+        sa.Column("period", sa.Integer(), nullable=True),
+        sa.Column("next_due_date", sa.Date(), nullable=True),
+        sa.Column("next_due_amount", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), server_default=sa.text("next_change_seq()"), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["customer_id"], ["customers.id"], ondelete="CASCADE"),
+    ]
+
+
+def create_contract_indexes():
+    op.create_index("ix_contracts_id", "contracts", ["id"])
+    op.create_index("ix_contracts_change_seq", "contracts", ["change_seq"])
+    op.create_index("ix_contracts_next_due_date", "contracts", ["next_due_date"])
+
+
+def drop_contract_indexes():
+    op.execute("DROP INDEX IF EXISTS ix_contracts_id, ix_contracts_change_seq, ix_contracts_next_due_date")
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    relkind = connection.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('contracts')")).scalar()
+    # fresh databases get the partitioned table straight from create_all
+    if relkind != "r":
+        return
+
+    for table in DEPENDENT_TABLES:
+        op.execute(f"ALTER TABLE IF EXISTS {table} DROP CONSTRAINT IF EXISTS {table}_contract_id_fkey")
+
+    op.execute("ALTER TABLE contracts RENAME TO contracts_legacy")
+    op.execute("ALTER SEQUENCE contracts_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE contracts_legacy DROP CONSTRAINT contracts_pkey, DROP CONSTRAINT IF EXISTS contracts_contract_number_key, DROP CONSTRAINT IF EXISTS contracts_customer_id_fkey")
+    drop_contract_indexes()
+
+    op.create_table(
+        "contracts",
+        *contract_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        sa.UniqueConstraint("contract_number", "created_at"),
+        postgresql_partition_by="RANGE (created_at)"
+    )
+
+    first_year, last_year = connection.execute(sa.text(
+        "SELECT extract(year FROM min(created_at) AT TIME ZONE 'Asia/Ho_Chi_Minh')::int, "
+        "extract(year FROM now() AT TIME ZONE 'Asia/Ho_Chi_Minh')::int + 1 FROM contracts_legacy"
+    )).one()
+    for year in range(first_year or last_year - 1, last_year + 1):
+        op.execute(
+            f"CREATE TABLE contracts_y{year} PARTITION OF contracts "
+            f"FOR VALUES FROM ('{year}-01-01 00:00:00+07:00') TO ('{year + 1}-01-01 00:00:00+07:00')"
+        )
+
+    op.execute(f"INSERT INTO contracts ({CONTRACT_COLUMNS}) SELECT {CONTRACT_COLUMNS} FROM contracts_legacy")
+    op.execute("DROP TABLE contracts_legacy")
+    op.execute("ALTER SEQUENCE contracts_id_seq OWNED BY contracts.id")
+    create_contract_indexes()
+
+    op.execute(
+        "CREATE OR REPLACE FUNCTION contracts_delete_cascade() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        "DELETE FROM payments WHERE contract_id = OLD.id; "
+        "DELETE FROM contract_balances WHERE contract_id = OLD.id; "
+        "DELETE FROM contract_accruals WHERE contract_id = OLD.id; "
+        "RETURN OLD; END $$"
+    )
+    op.execute(
+        "CREATE TRIGGER contracts_delete_cascade AFTER DELETE ON contracts "
+        "FOR EACH ROW EXECUTE FUNCTION contracts_delete_cascade()"
+    )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    relkind = connection.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('contracts')")).scalar()
+    if relkind != "p":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS contracts_delete_cascade ON contracts")
+    op.execute("DROP FUNCTION IF EXISTS contracts_delete_cascade()")
+    op.execute("ALTER TABLE contracts RENAME TO contracts_partitioned")
+    op.execute("ALTER SEQUENCE contracts_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE contracts_partitioned DROP CONSTRAINT contracts_pkey, DROP CONSTRAINT IF EXISTS contracts_customer_id_fkey")
+    drop_contract_indexes()
+
+    op.create_table(
+        "contracts",
+        *contract_columns(),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("contract_number")
+    )
+    op.execute(f"INSERT INTO contracts ({CONTRACT_COLUMNS}) SELECT {CONTRACT_COLUMNS} FROM contracts_partitioned")
+    op.execute("DROP TABLE contracts_partitioned")
+    op.execute("ALTER SEQUENCE contracts_id_seq OWNED BY contracts.id")
+    create_contract_indexes()
+
+    # archived contracts are no longer in the table, so existing ledger rows are not re-validated
+    for table in DEPENDENT_TABLES:
+        op.execute(
+            f"ALTER TABLE IF EXISTS {table} ADD CONSTRAINT {table}_contract_id_fkey "
+            f"FOREIGN KEY (contract_id) REFERENCES contracts (id) ON DELETE CASCADE NOT VALID"
+        )
@@ -0,0 +1,122 @@
+"""add change feed, search and due date columns
+
+Revision ID: 9c4e1b7a2f60
+Revises:
+Create Date: 2026-10-19 18:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1b7a2f60'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CHANGE_FEED_TABLES = ["customers", "users", "contracts"]
+
+SEARCH_INDEXES = {
+    "ix_customers_full_name_search_trgm": "full_name_search",
+    "ix_customers_address_search_trgm": "address_search",
+    "ix_customers_phone_number_trgm": "phone_number",
+    "ix_customers_cccd_trgm": "cccd",
+}
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    # fresh databases get every column straight from create_all
+    if connection.execute(sa.text("SELECT to_regclass('customers')")).scalar() is None:
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    )
+    op.execute("CREATE SEQUENCE IF NOT EXISTS change_seq")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION next_change_seq() RETURNS bigint LANGUAGE plpgsql VOLATILE AS $$ "
+        "BEGIN "
+        "IF coalesce(current_setting('change_feed.floor', true), '') = '' THEN "
+        "PERFORM set_config('change_feed.floor', (SELECT last_value FROM change_seq)::text, true); "
+        "PERFORM pg_advisory_xact_lock_shared(current_setting('change_feed.floor')::bigint); "
+        "END IF; "
+        "RETURN nextval('change_seq'); "
+        "END $$"
+    )
+
+    # existing rows get their first change_seq from the default while the column is added
+    for table in CHANGE_FEED_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now(), "
+            f"ADD COLUMN IF NOT EXISTS change_seq bigint NOT NULL DEFAULT next_change_seq()"
+        )
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_change_seq ON {table} (change_seq)")
+    op.execute("ALTER TABLE IF EXISTS tombstones ALTER COLUMN change_seq SET DEFAULT next_change_seq()")
+
+    op.execute(
+        "ALTER TABLE customers "
+        "ADD COLUMN IF NOT EXISTS full_name_search varchar GENERATED ALWAYS AS (lower(f_unaccent(full_name))) STORED, "
+        "ADD COLUMN IF NOT EXISTS address_search varchar GENERATED ALWAYS AS (lower(f_unaccent(address))) STORED"
+    )
+    for name, column in SEARCH_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON customers USING gin ({column} gin_trgm_ops)")
+
+    op.execute(
+        "ALTER TABLE contracts "
+        "ADD COLUMN IF NOT EXISTS next_due_date date, "
+        "ADD COLUMN IF NOT EXISTS next_due_amount integer"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_contracts_next_due_date ON contracts (next_due_date)")
+
+    # the same schedule as compute_next_due(), evaluated for today in Asia/Ho_Chi_Minh
+    op.execute(
+        "UPDATE contracts SET "
+        "next_due_date = due.next_due_date, "
+        "next_due_amount = contracts.daily_payment * (due.next_due_date - due.previous_due_date) "
+        "FROM ("
+        "SELECT id, "
+        "least(start_date + installment * period, start_date + duration) AS next_due_date, "
+        "start_date + (installment - 1) * period AS previous_due_date "
+        "FROM ("
+        "SELECT id, start_date, duration, period, "
+        "greatest(ceil(greatest(today - start_date, 0)::numeric / period)::int, 1) AS installment "
+        "FROM ("
+        "SELECT id, start_date, duration, coalesce(nullif(period, 0), 1) AS period, "
+        "(now() AT TIME ZONE 'Asia/Ho_Chi_Minh')::date AS today "
+        "FROM contracts WHERE start_date IS NOT NULL AND duration IS NOT NULL AND duration <> 0"
+        ") contract "
+        "WHERE today <= start_date + duration"
+        ") schedule"
+        ") due "
+        "WHERE contracts.id = due.id"
+    )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    if connection.execute(sa.text("SELECT to_regclass('customers')")).scalar() is None:
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_contracts_next_due_date")
+    op.execute("ALTER TABLE contracts DROP COLUMN IF EXISTS next_due_date, DROP COLUMN IF EXISTS next_due_amount")
+
+    for name in SEARCH_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER TABLE customers DROP COLUMN IF EXISTS full_name_search, DROP COLUMN IF EXISTS address_search")
+
+    op.execute("ALTER TABLE IF EXISTS tombstones ALTER COLUMN change_seq SET DEFAULT nextval('change_seq')")
+    for table in CHANGE_FEED_TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_change_seq")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS updated_at, DROP COLUMN IF EXISTS change_seq")
+
+    op.execute("DROP FUNCTION IF EXISTS next_change_seq()")
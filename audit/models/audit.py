@@ -0,0 +1,54 @@
+from sqlalchemy import BigInteger, Column, DDL, Index, Integer, String, event, func
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+from configs.database import Base, IS_SQLITE
+from job.models.job import JSON_DOCUMENT
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_logs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True, nullable=False)
+    actor_id = Column(Integer, nullable=True)
+    # the customer and contract routers authenticate nobody, so the address is often the only trace of the caller
+    client_address = Column(String, nullable=True)
+    route = Column(String, nullable=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=True)
+    action = Column(String, nullable=False)
+    before = Column(JSON_DOCUMENT, nullable=True)
+    after = Column(JSON_DOCUMENT, nullable=True)
+
+    # set when the change commits, not when the batch is written; it is also the partition key
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=not IS_SQLITE, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_audit_logs_entity", "entity", "entity_id", "created_at"),
+        Index("ix_audit_logs_actor", "actor_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# rows are only ever inserted; old months are removed by detaching their partition
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION audit_logs_append_only() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        "RAISE EXCEPTION 'audit_logs is append-only'; "
+        "END $$;"
+        "CREATE TRIGGER audit_logs_append_only BEFORE UPDATE OR DELETE ON audit_logs "
+        "FOR EACH ROW EXECUTE FUNCTION audit_logs_append_only();"
+        "CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;"
+    ).execute_if(dialect="postgresql")
+)
+
+for operation in ("UPDATE", "DELETE"):
+    event.listen(
+        AuditLog.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER audit_logs_no_{operation.lower()} BEFORE {operation} ON audit_logs "
+            "BEGIN SELECT RAISE(ABORT, 'audit_logs is append-only'); END"
+        ).execute_if(dialect="sqlite")
+    )
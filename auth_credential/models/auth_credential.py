@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, func, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from configs.database import Base
@@ -11,6 +11,6 @@ class AuthCredential(Base):
     user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), unique=True, nullable=False, index=True)
     hashed_password = Column(String, nullable=False)
 
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
     user = relationship("User", back_populates="auth_credential", passive_deletes=True)
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import Integer, String, column, select, update, values
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from configs.conf import settings
-from configs.database import get_db
+from configs.database import IS_SQLITE, get_db
 from configs.authentication import get_current_user, hash_password
 from auth_credential.models.auth_credential import AuthCredential
-from auth_credential.schemas.auth_credential import AuthCredentialResponse, AuthCredentialPageableResponse
+from auth_credential.schemas.auth_credential import AuthCredentialResponse, AuthCredentialPageableResponse, AuthCredentialResetMany
+from utils.audit_log import record_audit, snapshot
+from utils.process_pool import map_in_pool
 import math
 
 
@@ -106,16 +110,18 @@ async def reset_user_password(
 
     try:
         auth_credential = db.query(AuthCredential).filter(AuthCredential.id == auth_credential_id)
-        if not auth_credential.first():
+        existing_credential = auth_credential.first()
+        if not existing_credential:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="Tài khoản không tồn tại"
             )
 
         auth_credential.update(
-            {"password": hash_password(DEFAULT_PASSWORD)}, 
+            {"hashed_password": hash_password(DEFAULT_PASSWORD)}, 
             synchronize_session=False
         )
+        record_audit(db, "auth_credential", "reset_password", auth_credential_id, snapshot(existing_credential), snapshot(existing_credential))
         db.commit()    
 
         return {"message": "Reset mật khẩu thành công"}
@@ -135,6 +141,73 @@ async def reset_user_password(
         )
 
 
+@router.put("/reset-password-many",
+            status_code=status.HTTP_200_OK)
+async def reset_many_user_passwords(
+        ids: AuthCredentialResetMany,
+        db: Session = Depends(get_db), 
+        current_user = Depends(get_current_user)
+    ):
+
+    requested_ids = list(dict.fromkeys(ids.list_id))
+    if not requested_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Danh sách tài khoản trống"
+        )
+
+    try:
+        existing_ids = db.execute(
+            select(AuthCredential.id).where(AuthCredential.id.in_(requested_ids)).order_by(AuthCredential.id)
+        ).scalars().all()
+
+        # bcrypt is deliberately slow, every credential still gets its own salt
+        hashes = await map_in_pool(hash_password, [DEFAULT_PASSWORD] * len(existing_ids))
+        rows = list(zip(existing_ids, hashes))
+
+        if IS_SQLITE:
+            # SQLite cannot alias the columns of a VALUES list, fall back to an executemany by primary key
+            if rows:
+                db.execute(update(AuthCredential), [{"id": id, "hashed_password": hashed} for id, hashed in rows])
+            reset_ids = set(existing_ids)
+        elif rows:
+            new_hashes = values(
+                column("id", Integer),
+                column("hashed_password", String),
+                name="new_hashes"
+            ).data(rows)
+            reset_ids = set(db.execute(
+                update(AuthCredential)
+                .where(AuthCredential.id == new_hashes.c.id)
+                .values(hashed_password=new_hashes.c.hashed_password)
+                .returning(AuthCredential.id)
+            ).scalars())
+        else:
+            reset_ids = set()
+        for id in sorted(reset_ids):
+            record_audit(db, "auth_credential", "reset_password", id)
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "message": "Reset mật khẩu thành công",
+                "total_data": len(reset_ids),
+                "results": [
+                    {"id": id, "status": "reset" if id in reset_ids else "not_found"}
+                    for id in requested_ids
+                ]
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail=f"Lỗi cơ sở dữ liệu: {str(e)}"
+        )
+
+
 @router.put("/update-password/{auth_credential_id}",
             status_code=status.HTTP_200_OK)
 async def update_user_password(
@@ -146,16 +219,18 @@ async def update_user_password(
 
     try:
         auth_credential = db.query(AuthCredential).filter(AuthCredential.id == auth_credential_id)
-        if not auth_credential.first():
+        existing_credential = auth_credential.first()
+        if not existing_credential:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="Tài khoản không tồn tại"
             )
 
         auth_credential.update(
-            {"password": hash_password(password)}, 
+            {"hashed_password": hash_password(password)}, 
             synchronize_session=False
         )
+        record_audit(db, "auth_credential", "update_password", auth_credential_id, snapshot(existing_credential), snapshot(existing_credential))
         db.commit()
 
         return {"message": "Cập nhật mật khẩu thành công"}
@@ -185,13 +260,15 @@ async def delete_auth_credential(
 
     try:
         auth_credential = db.query(AuthCredential).filter(AuthCredential.id == auth_credential_id)
-        if not auth_credential.first():
+        existing_credential = auth_credential.first()
+        if not existing_credential:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="Tài khoản không tồn tại"
             )
 
         auth_credential.delete(synchronize_session=False)
+        record_audit(db, "auth_credential", "delete", auth_credential_id, before=snapshot(existing_credential))
         db.commit()
 
         return {"message": "Xóa tài khoản thành công"}
@@ -221,11 +298,14 @@ async def delete_user_accounts(
 
     try:
         auth_credentials = db.query(AuthCredential).filter(AuthCredential.id.in_(auth_credential_ids))
-        if not auth_credentials.first():
+        deleted_credentials = auth_credentials.all()
+        if not deleted_credentials:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="Tài khoản không tồn tại")
 
         auth_credentials.delete(synchronize_session=False)
+        for deleted_credential in deleted_credentials:
+            record_audit(db, "auth_credential", "delete", deleted_credential.id, before=snapshot(deleted_credential))
         db.commit()
 
         return {"message": "Xóa tài khoản thành công"}
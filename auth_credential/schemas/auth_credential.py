@@ -18,3 +18,10 @@ class AuthCredentialPageableResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class AuthCredentialResetMany(BaseModel):
+    list_id: list[int]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, Column, Integer, String, func, text
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+from configs.database import Base
+
+
+class LoginFailure(Base):
+    __tablename__ = "login_failures"
+
+    key = Column(String, primary_key=True, nullable=False)
+    window_index = Column(BigInteger, nullable=False, index=True)
+    count = Column(Integer, nullable=False, server_default=text('0'))
+    previous_count = Column(Integer, nullable=False, server_default=text('0'))
+
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -1,9 +1,10 @@
-from fastapi import status, HTTPException, Depends, APIRouter
+from fastapi import BackgroundTasks, status, HTTPException, Depends, APIRouter, Request
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from user.models.user import User
-from configs.authentication import verify_password, create_access_token
+from configs.authentication import verify_password, create_access_token, password_needs_rehash, rehash_password
 from configs.database import get_db
+from utils.login_throttle import login_throttle
+from utils.hot_queries import user_by_username
 
 
 router = APIRouter(tags=["Login"])
@@ -12,24 +13,44 @@ router = APIRouter(tags=["Login"])
 @router.post("/login", 
              status_code=status.HTTP_200_OK)
 async def login_user(
+        request: Request,
+        background_tasks: BackgroundTasks,
         user_credentials: OAuth2PasswordRequestForm = Depends(),
         db: Session = Depends(get_db)
     ):
-    
-    user = db.query(User).filter(User.username == user_credentials.username).first()
+
+    throttle_keys = login_throttle.keys(user_credentials.username, request.client.host if request.client else None)
+    retry_after, has_failures = login_throttle.check(db, throttle_keys)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Đăng nhập sai quá nhiều lần, vui lòng thử lại sau",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    user = db.execute(user_by_username(user_credentials.username)).scalars().first()
     
     if not user:
+        login_throttle.fail(db, throttle_keys)
         raise HTTPException(
             status_code=status.HTTP_406_NOT_ACCEPTABLE,
             detail="Invalid Credentials!"
         )
 
     if not verify_password(user_credentials.password, user.auth_credential.hashed_password):
+        login_throttle.fail(db, throttle_keys)
         raise HTTPException(
             status_code=status.HTTP_406_NOT_ACCEPTABLE,
             detail="Invalid Credentials!"
         )
     
+    if has_failures:
+        login_throttle.succeed(db, user_credentials.username)
+
+    credential = user.auth_credential
+    if password_needs_rehash(credential.hashed_password):
+        background_tasks.add_task(rehash_password, credential.id, user_credentials.password, credential.hashed_password)
+
     access_token, expire = create_access_token(data={"user_id": user.id})
     
     return {"access_token": access_token,
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def seed(customers: int):
+    from sqlalchemy import insert
+    from configs.database import SessionLocal
+    from contract.models.contract import Contract
+    from customer.models.customer import Customer
+    from utils.contract_schedule import local_today
+
+    # contract numbers carry the creation date, which the lookup uses to pick the partition
+    today = local_today()
+    db = SessionLocal()
+    try:
+        if db.query(Customer).count():
+            return
+        db.execute(insert(Customer), [
+            {"full_name": f"Khách hàng {index}", "cccd": f"{index:012d}", "address": f"Số {index} Hà Nội"}
+            for index in range(1, customers + 1)
+        ])
+        db.execute(insert(Contract), [
+            {
+                "contract_number": f"HD-{today:%Y%m%d}-{index:04d}",
+                "customer_id": index,
+                "loan": 1000000,
+                "duration": 30,
+                "period": 1,
+                "daily_payment": 40000,
+                "start_date": today
+            }
+            for index in range(1, customers + 1)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def scenarios(client, headers: dict):
+    from utils.contract_schedule import local_today
+
+    counter = iter(range(10 ** 9))
+
+    def create_customer():
+        index = next(counter)
+        return client.post("/customer/create", json={"full_name": f"Bench {index}", "cccd": f"B{index:011d}"})
+
+    return {
+        "GET /customer/pageable": lambda: client.get("/customer/pageable", params={"page": 3, "page_size": 50}),
+        "GET /contract/{number}": lambda: client.get(f"/contract/HD-{local_today():%Y%m%d}-0042"),
+        "GET /customer/search": lambda: client.get("/customer/search", params={"keyword": "khach hang 42"}),
+        "GET /payment/balance": lambda: client.get("/payment/balance/42", headers=headers),
+        "POST /customer/create": create_customer,
+        "POST /payment/create": lambda: client.post("/payment/create", json={"contract_id": 42, "amount": 40000}, headers=headers)
+    }
+
+
+def run_worker(iterations: int, customers: int):
+    from fastapi.testclient import TestClient
+    import main
+    from configs.database import engine
+
+    seed(customers)
+    results = {"backend": engine.dialect.name}
+    with TestClient(main.app) as client:
+        client.post("/user/create", json={"username": "bench", "password": "Benchmark1", "full_name": "Bench"})
+        token = client.post("/login", data={"username": "bench", "password": "Benchmark1"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for name, request in scenarios(client, headers).items():
+            request()
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[name] = {
+                "status": response.status_code,
+                "p50": statistics.median(timings),
+                "p95": timings[int(len(timings) * 0.95) - 1]
+            }
+
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare request latency of the API on different DATABASE_URL backends")
+    parser.add_argument("--url", action="append", help="scratch database to benchmark against, repeatable")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.iterations, args.customers)
+        raise SystemExit
+
+    # the engine is built at import time, so each backend gets its own interpreter
+    reports = []
+    for url in args.url or ["sqlite:///benchmark.db"]:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.backends", "--worker", "--iterations", str(args.iterations), "--customers", str(args.customers)],
+            env={**os.environ, "DATABASE_URL": url},
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'request':<26}" + "".join(f"{report['backend'] + ' p50':>16}{'p95':>10}{'status':>8}" for report in reports) + "   (ms)")
+    for name in reports[0]:
+        if name == "backend":
+            continue
+        print(f"{name:<26}" + "".join(
+            f"{report[name]['p50']:>16.2f}{report[name]['p95']:>10.2f}{report[name]['status']:>8}" for report in reports
+        ))
@@ -0,0 +1,67 @@
+import argparse
+import time
+from sqlalchemy import select
+from auth_credential.models.auth_credential import AuthCredential
+from configs.database import SessionLocal
+from contract.models.contract import Contract
+from customer.models.customer import Customer
+from user.models.user import User
+from utils.contract_partition import contract_number_filter
+from utils.hot_queries import contract_by_number, customer_by_id, user_by_id, user_by_username
+
+
+def measure(db, run, iterations: int):
+    run()
+    db.expunge_all()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        run()
+        db.expunge_all()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def lookups(db, user: User, customer: Customer, contract: Contract):
+    return {
+        "user by id": {
+            "query": lambda: db.query(User).filter(User.id == user.id).first(),
+            "select": lambda: db.execute(select(User).where(User.id == user.id)).scalars().first(),
+            "lambda": lambda: db.execute(user_by_id(user.id)).scalars().first()
+        },
+        "user by username": {
+            "query": lambda: db.query(User).filter(User.username == user.username).first(),
+            "select": lambda: db.execute(select(User).where(User.username == user.username)).scalars().first(),
+            "lambda": lambda: db.execute(user_by_username(user.username)).scalars().first()
+        },
+        "customer by id": {
+            "query": lambda: db.query(Customer).filter(Customer.id == customer.id).first(),
+            "select": lambda: db.execute(select(Customer).where(Customer.id == customer.id)).scalars().first(),
+            "lambda": lambda: db.execute(customer_by_id(customer.id)).scalars().first()
+        },
+        "contract by number": {
+            "query": lambda: db.query(Contract).filter(Contract.contract_number.ilike(contract.contract_number)).first(),
+            "select": lambda: db.execute(select(Contract).where(*contract_number_filter(contract.contract_number)).limit(1)).scalars().first(),
+            "lambda": lambda: db.execute(contract_by_number(contract.contract_number)).scalars().first()
+        }
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare legacy Query, select() and cached lambda statements for hot lookups")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).first()
+        customer = db.query(Customer).first()
+        contract = db.query(Contract).first()
+        if not (user and customer and contract):
+            raise SystemExit("Need at least one user, customer and contract to benchmark")
+
+        print(f"{'lookup':<20}{'query':>12}{'select':>12}{'lambda':>12}   (us per call)")
+        for name, variants in lookups(db, user, customer, contract).items():
+            timings = {variant: measure(db, run, args.iterations) for variant, run in variants.items()}
+            print(f"{name:<20}{timings['query']:>12.1f}{timings['select']:>12.1f}{timings['lambda']:>12.1f}")
+
+    finally:
+        db.close()
@@ -4,15 +4,24 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from authen.schemas.authen import Tokendata
-from configs.database import get_db
+from auth_credential.models.auth_credential import AuthCredential
+from configs.database import SessionLocal, get_db
 from user.models.user import User
+from utils.hot_queries import user_by_id
 from .conf import settings
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-pwd_context = CryptContext(schemes=["bcrypt"])
+# hashes at any other cost than the calibrated one are flagged by needs_update() and upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    bcrypt__rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds
+)
 
 
 SECRET_KEY = settings.secret_key
@@ -28,6 +37,24 @@ def verify_password(plain_password, hassed_password):
     return pwd_context.verify(plain_password, hassed_password)
 
 
+def password_needs_rehash(hashed_password):
+    return pwd_context.needs_update(hashed_password)
+
+
+def rehash_password(auth_credential_id: int, password: str, old_hashed_password: str):
+    db = SessionLocal()
+    try:
+        # skip the write if the password was changed while this task waited
+        db.execute(
+            update(AuthCredential)
+            .where(AuthCredential.id == auth_credential_id, AuthCredential.hashed_password == old_hashed_password)
+            .values(hashed_password=hash_password(password))
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
 def create_access_token(data: dict):
     
     to_encode = data.copy()
@@ -60,10 +87,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"}
     )
     token = verify_access_token(token, credentials_exception) 
-    user = db.query(User).filter(User.id == token.user_id).first()
+    user = db.execute(user_by_id(token.user_id)).scalars().first()
     return user
 
 
+def get_current_admin(current_user: User = Depends(get_current_user)):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bạn không có quyền truy cập"
+        )
+
+    return current_user
+
+
 def validate_pwd(password):
     if len(password) < 8:
         raise HTTPException(
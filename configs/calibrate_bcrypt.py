@@ -0,0 +1,62 @@
+import argparse
+import os
+import re
+import statistics
+import time
+from passlib.hash import bcrypt
+
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+def measure_verify(rounds: int, samples: int):
+    hashed = bcrypt.using(rounds=rounds).hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int):
+    # each extra round doubles the work, so stop at the first cost that goes over the target
+    timings = {}
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        timings[rounds] = measure_verify(rounds, samples)
+        if timings[rounds] > target_ms:
+            break
+
+    within_target = [rounds for rounds, elapsed in timings.items() if elapsed <= target_ms]
+    return (max(within_target) if within_target else MIN_ROUNDS), timings
+
+
+def write_env(env_file: str, rounds: int):
+    lines = []
+    if os.path.exists(env_file):
+        with open(env_file, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+
+    pattern = re.compile(r"^\s*BCRYPT_ROUNDS\s*=", re.IGNORECASE)
+    lines = [line for line in lines if not pattern.match(line)] + [f"BCRYPT_ROUNDS={rounds}"]
+    with open(env_file, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the bcrypt cost whose verification takes about --target-ms on this host")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--env-file", default=".env")
+    parser.add_argument("--write", action="store_true", help="store BCRYPT_ROUNDS in --env-file")
+    args = parser.parse_args()
+
+    rounds, timings = calibrate(args.target_ms, args.samples)
+    for cost, elapsed in timings.items():
+        print(f"rounds={cost:<4}{elapsed:>10.1f} ms")
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+    if args.write:
+        write_env(args.env_file, rounds)
+        print(f"written to {args.env_file}, restart the API to apply; existing hashes are upgraded on their next login")
@@ -1,21 +1,97 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    database_hostname: str
-    database_port: int
-    database_name: str
-    database_username: str
-    database_password: str
+    database_url: Optional[str] = None
+    database_hostname: str = "localhost"
+    database_port: int = 5432
+    database_name: str = ""
+    database_username: str = ""
+    database_password: str = ""
+    database_pool_size: int = 20
+    database_max_overflow: int = 10
+    database_pool_timeout: int = 5
+
+    sqlite_mmap_bytes: int = 256 * 1024 * 1024
+    sqlite_cache_kb: int = 64 * 1024
+    sqlite_busy_timeout_ms: int = 5000
 
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
 
+    bcrypt_rounds: int = 12
+
+    login_window_seconds: int = 900
+    login_max_failures_per_user: int = 5
+    login_max_failures_per_ip: int = 30
+    login_throttle_max_keys: int = 10000
+    login_throttle_shared: bool = False
+
     default_password: str
     port: int
     host: str
 
+    event_buffer_size: int = 100
+    event_heartbeat_seconds: int = 15
+
+    archive_dir: str = "archive"
+    contract_number_attempts: int = 3
+
+    template_dir: str = "templates"
+    template_cache_dir: str = "cache/templates"
+    document_cache_dir: str = "cache/documents"
+    document_lender_name: str = ""
+    document_batch_limit: int = 500
+
+    statement_dir: str = "statements"
+    statement_fetch_size: int = 5000
+
+    audit_buffer_size: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_seconds: float = 1.0
+    audit_write_attempts: int = 5
+
+    admission_limits: dict[str, tuple[int, int]] = {
+        "auth": (4, 16),
+        "list": (14, 56),
+        "write": (8, 32),
+        "export": (2, 4)
+    }
+    admission_wait_seconds: float = 3
+
+    database_statement_timeout_ms: int = 0
+    statement_timeout_ms: dict[str, int] = {
+        "auth": 5000,
+        "list": 10000,
+        "write": 15000,
+        "export": 120000
+    }
+    admission_retry_after: int = 2
+
+    single_flight_max_keys: int = 1000
+    single_flight_max_body_bytes: int = 8 * 1024 * 1024
+
+    slow_query_ms: int = 200
+    slow_query_buffer_size: int = 200
+    slow_query_explain: bool = True
+    slow_query_explain_rate: float = 0.2
+    slow_query_explain_interval: int = 300
+
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0
+    profiling_interval: float = 0.001
+    profiling_format: str = "speedscope"
+    profiling_dir: str = "profiles"
+
+    job_concurrency: dict[str, int] = {"default": 2, "reports": 1}
+    job_poll_seconds: float = 5
+    job_lease_seconds: int = 900
+    job_retry_seconds: int = 30
+
+    process_pool_workers: Optional[int] = None
+
     class Config:
         env_file = ".env"
 
@@ -1,21 +1,107 @@
-from sqlalchemy import create_engine
+from datetime import timedelta
+from sqlalchemy import DDL, Integer, Sequence, cast, create_engine, event, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from .conf import settings
+from utils.query_deadline import install_query_deadline_hooks
+from utils.slow_queries import install_slow_query_hooks
+from utils.sqlite_support import install_sqlite_support
 
 
-SQLALCHEMY_DATABASE_URL = f'postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}'
+SQLALCHEMY_DATABASE_URL = settings.database_url or f'postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}'
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+IS_SQLITE = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
+
+if not IS_SQLITE:
+    # a server-wide ceiling for every connection; requests tighten it per route with SET LOCAL
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        connect_args={"options": f"-c statement_timeout={settings.database_statement_timeout_ms}"}
+    )
+elif make_url(SQLALCHEMY_DATABASE_URL).database in (None, "", ":memory:"):
+    # an in-memory database only lives as long as its connection, so every session shares one
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+else:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout
+    )
+
+if IS_SQLITE:
+    install_sqlite_support(engine)
+install_slow_query_hooks(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+install_query_deadline_hooks(engine, SessionLocal)
+
 Base = declarative_base()
 
+CHANGE_SEQ = Sequence("change_seq", metadata=Base.metadata)
+
+# sequence values are handed out before commit, so a plain nextval() can become visible after a larger one.
+# The first change of each transaction holds a shared advisory lock keyed by the sequence value at that moment;
+# the change feed reads pg_locks and stops below the smallest such floor (plpgsql, the sequence is created later)
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION next_change_seq() RETURNS bigint LANGUAGE plpgsql VOLATILE AS $$ "
+        "BEGIN "
+        "IF coalesce(current_setting('change_feed.floor', true), '') = '' THEN "
+        "PERFORM set_config('change_feed.floor', (SELECT last_value FROM change_seq)::text, true); "
+        "PERFORM pg_advisory_xact_lock_shared(current_setting('change_feed.floor')::bigint); "
+        "END IF; "
+        "RETURN nextval('change_seq'); "
+        "END $$"
+    ).execute_if(dialect="postgresql")
+)
+
+
+def next_change_seq():
+    return func.next_change_seq()
+
+
+def upsert(table):
+    # both dialects expose the same on_conflict_do_update() API
+    return sqlite_insert(table) if IS_SQLITE else pg_insert(table)
+
+
+def seconds_from_now(seconds: float):
+    if IS_SQLITE:
+        return func.datetime("now", f"{seconds:+} seconds")
+    return func.now() + timedelta(seconds=seconds)
+
+
+def add_days(day, days):
+    if IS_SQLITE:
+        return func.date(day, func.printf("%+d days", days))
+    return day + days
+
+
+def days_between(later, earlier):
+    if IS_SQLITE:
+        return cast(func.julianday(later) - func.julianday(earlier), Integer)
+    return later - earlier
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-
@@ -0,0 +1,78 @@
+import argparse
+from sqlalchemy import exists, func, or_, select, text
+from configs.database import engine
+from contract.models.contract import Contract
+from customer.models.customer import Customer
+from payment.models.payment import ContractBalance
+from utils.contract_archive import write_contract_archive
+from utils.contract_partition import ensure_contract_partitions, list_contract_partitions, partition_name, year_bounds
+from utils.contract_schedule import local_today
+
+
+def has_open_contracts(connection, year: int, include_unpaid: bool = False):
+    start, end = year_bounds(year)
+    end_date = Contract.start_date + func.coalesce(Contract.duration, 0)
+    is_open = or_(Contract.start_date.is_(None), end_date >= local_today())
+
+    # a contract past its term still counts as open while money is owed, unless the caller explicitly opts in
+    if not include_unpaid:
+        total_due = func.coalesce(
+            func.nullif(func.coalesce(Contract.daily_payment, 0) * func.coalesce(Contract.duration, 0), 0),
+            Contract.loan,
+            0
+        )
+        total_paid = select(ContractBalance.total_paid).where(
+            ContractBalance.contract_id == Contract.id
+        ).scalar_subquery()
+        is_open = or_(is_open, func.coalesce(total_paid, 0) < total_due)
+
+    return connection.execute(select(exists().where(
+        Contract.created_at >= start,
+        Contract.created_at < end,
+        is_open
+    ))).scalar()
+
+
+def archive_partition(year: int, include_unpaid: bool = False, keep_table: bool = False):
+    name = partition_name(year)
+    with engine.begin() as connection:
+        # block writes to this partition only while it is exported and detached
+        connection.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+        if has_open_contracts(connection, year, include_unpaid):
+            return None
+
+        total_rows = write_contract_archive(connection, year)
+        connection.execute(text(f"ALTER TABLE contracts DETACH PARTITION {name}"))
+        if not keep_table:
+            connection.execute(text(f"DROP TABLE {name}"))
+
+    return total_rows
+
+
+def archive_contracts(before_year: int, include_unpaid: bool = False, keep_table: bool = False):
+    with engine.begin() as connection:
+        ensure_contract_partitions(connection)
+        years = [year for year in list_contract_partitions(connection) if year < before_year]
+
+    archived = {}
+    for year in years:
+        total_rows = archive_partition(year, include_unpaid, keep_table)
+        if total_rows is None:
+            print(f"{partition_name(year)}: still has open contracts, skipped")
+            continue
+
+        archived[year] = total_rows
+        print(f"{partition_name(year)}: archived {total_rows} contracts")
+
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export closed contract partitions to Parquet and detach them")
+    parser.add_argument("--before-year", type=int, default=local_today().year - 2)
+    parser.add_argument("--include-unpaid", action="store_true", help="also archive partitions whose ended contracts are not fully repaid")
+    parser.add_argument("--keep-table", action="store_true")
+    args = parser.parse_args()
+
+    archived = archive_contracts(args.before_year, args.include_unpaid, args.keep_table)
+    print(f"Archived {len(archived)} partitions, {sum(archived.values())} contracts")
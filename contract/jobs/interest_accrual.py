@@ -0,0 +1,184 @@
+import argparse
+import io
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert, select
+from configs.database import IS_SQLITE, engine
+from contract.models.contract import Contract
+from contract.models.contract_accrual import ContractAccrual, ContractAccrualStaging
+from customer.models.customer import Customer
+from payment.models.payment import ContractBalance
+from utils.contract_schedule import local_today
+
+
+SNAPSHOT_COLUMNS = [
+    "as_of_date",
+    "contract_id",
+    "accrued_interest",
+    "expected_paid",
+    "total_paid",
+    "overdue_amount",
+    "overdue_days",
+    "is_overdue"
+]
+
+
+def load_chunk(connection, start_id: int, end_id: int, as_of: date):
+    query = select(
+        Contract.id.label("contract_id"),
+        Contract.loan,
+        Contract.interest_rate,
+        Contract.period,
+        Contract.duration,
+        Contract.start_date,
+        Contract.daily_payment,
+        func.coalesce(ContractBalance.total_paid, 0).label("total_paid")
+    ).outerjoin(
+        ContractBalance, ContractBalance.contract_id == Contract.id
+    ).where(
+        Contract.id >= start_id,
+        Contract.id < end_id,
+        Contract.start_date <= as_of,
+        Contract.duration > 0
+    )
+    return pd.read_sql(query, connection)
+
+
+def compute_accruals(chunk: pd.DataFrame, as_of: date):
+    start_date = pd.to_datetime(chunk["start_date"]).values.astype("datetime64[D]")
+    duration = chunk["duration"].to_numpy(dtype=np.int64)
+    period = np.maximum(chunk["period"].astype("float64").fillna(1).to_numpy(dtype=np.int64), 1)
+    loan = chunk["loan"].astype("float64").fillna(0).to_numpy()
+    rate = chunk["interest_rate"].astype("float64").fillna(0).to_numpy() / 100
+    daily_payment = chunk["daily_payment"].astype("float64").fillna(0).to_numpy(dtype=np.int64)
+    total_paid = chunk["total_paid"].to_numpy(dtype=np.int64)
+
+    elapsed = (np.datetime64(as_of, "D") - start_date).astype(np.int64)
+    elapsed = np.clip(elapsed, 0, duration)
+
+    expected_paid = np.where(
+        elapsed >= duration,
+        daily_payment * duration,
+        daily_payment * (elapsed // period) * period
+    )
+    overdue_amount = np.maximum(expected_paid - total_paid, 0)
+    overdue_days = np.where(
+        daily_payment > 0,
+        -(-overdue_amount // np.maximum(daily_payment, 1)),
+        0
+    )
+
+    # active: still inside the term, or past it with money outstanding
+    active = (elapsed < duration) | (total_paid < daily_payment * duration)
+
+    snapshot = pd.DataFrame({
+        "as_of_date": as_of,
+        "contract_id": chunk["contract_id"].to_numpy(),
+        "accrued_interest": np.round(loan * rate * elapsed / period, 2),
+        "expected_paid": expected_paid,
+        "total_paid": total_paid,
+        "overdue_amount": overdue_amount,
+        "overdue_days": overdue_days,
+        "is_overdue": overdue_amount > 0
+    })
+    return snapshot[active]
+
+
+def copy_snapshot(snapshot: pd.DataFrame, run_id: str):
+    snapshot = snapshot.assign(run_id=run_id)
+    columns = ["run_id", *SNAPSHOT_COLUMNS]
+    if IS_SQLITE:
+        with engine.begin() as connection:
+            connection.execute(insert(ContractAccrualStaging), snapshot[columns].to_dict("records"))
+        return
+
+    buffer = io.StringIO()
+    snapshot.to_csv(buffer, index=False, header=False, columns=columns)
+    buffer.seek(0)
+
+    raw_connection = engine.raw_connection()
+    try:
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {ContractAccrualStaging.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        raw_connection.commit()
+    finally:
+        raw_connection.close()
+
+
+def process_chunk(start_id: int, end_id: int, as_of: date, run_id: str):
+    with engine.connect() as connection:
+        chunk = load_chunk(connection, start_id, end_id, as_of)
+
+    if chunk.empty:
+        return 0, 0
+
+    snapshot = compute_accruals(chunk, as_of)
+    if not snapshot.empty:
+        copy_snapshot(snapshot, run_id)
+
+    return len(snapshot), int(snapshot["is_overdue"].sum())
+
+
+def init_worker():
+    # connections inherited from the parent process must not be reused after fork
+    engine.dispose(close=False)
+
+
+def publish_snapshot(as_of: date, run_id: str):
+    # readers keep the previous snapshot of the day until this transaction commits the complete new one
+    staged = select(*[getattr(ContractAccrualStaging, column) for column in SNAPSHOT_COLUMNS]).where(ContractAccrualStaging.run_id == run_id)
+    with engine.begin() as connection:
+        connection.execute(delete(ContractAccrual).where(ContractAccrual.as_of_date == as_of))
+        connection.execute(insert(ContractAccrual).from_select(SNAPSHOT_COLUMNS, staged))
+        connection.execute(delete(ContractAccrualStaging).where(ContractAccrualStaging.run_id == run_id))
+
+
+def discard_staging(run_id: str):
+    with engine.begin() as connection:
+        connection.execute(delete(ContractAccrualStaging).where(ContractAccrualStaging.run_id == run_id))
+
+
+def run_interest_accrual(as_of: date, chunk_size: int = 50000, workers: int = 4, progress=None):
+    started = time.monotonic()
+    with engine.connect() as connection:
+        min_id, max_id = connection.execute(select(func.min(Contract.id), func.max(Contract.id))).one()
+
+    run_id = uuid.uuid4().hex
+    bounds = [(start_id, start_id + chunk_size) for start_id in range(min_id, max_id + 1, chunk_size)] if min_id is not None else []
+    total_rows, total_overdue = 0, 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            futures = [pool.submit(process_chunk, start_id, end_id, as_of, run_id) for start_id, end_id in bounds]
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows, overdue = future.result()
+                total_rows += rows
+                total_overdue += overdue
+                print(f"[{done}/{len(bounds)}] {total_rows} contracts, {total_overdue} overdue, {time.monotonic() - started:.1f}s")
+                if progress:
+                    progress(done, len(bounds), f"{total_rows} contracts, {total_overdue} overdue")
+
+        publish_snapshot(as_of, run_id)
+    except BaseException:
+        discard_staging(run_id)
+        raise
+
+    return total_rows, total_overdue
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the nightly interest accrual and overdue snapshot")
+    parser.add_argument("--date", type=date.fromisoformat, default=local_today())
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    rows, overdue = run_interest_accrual(args.date, args.chunk_size, args.workers)
+    print(f"Wrote {rows} accrual rows for {args.date}, {overdue} overdue")
@@ -0,0 +1,63 @@
+import argparse
+from datetime import date
+from sqlalchemy import update
+from configs.database import SessionLocal
+from contract.models.contract import Contract
+from customer.models.customer import Customer
+from utils.contract_schedule import compute_next_due, local_today
+
+
+def roll_due_dates(on_date: date, batch_size: int = 5000):
+    db = SessionLocal()
+    try:
+        last_id, total = 0, 0
+        while True:
+            contracts = db.query(
+                Contract.id,
+                Contract.created_at,
+                Contract.start_date,
+                Contract.duration,
+                Contract.period,
+                Contract.daily_payment
+            ).filter(
+                Contract.next_due_date < on_date,
+                Contract.id > last_id
+            ).order_by(Contract.id).limit(batch_size).all()
+            if not contracts:
+                break
+
+            changes = []
+            for contract in contracts:
+                next_due_date, next_due_amount = compute_next_due(
+                    contract.start_date,
+                    contract.duration,
+                    contract.period,
+                    contract.daily_payment,
+                    on_date
+                )
+                changes.append({
+                    "id": contract.id,
+                    "created_at": contract.created_at,
+                    "next_due_date": next_due_date,
+                    "next_due_amount": next_due_amount
+                })
+
+            db.execute(update(Contract), changes)
+            db.commit()
+
+            last_id = contracts[-1].id
+            total += len(changes)
+
+        return total
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll contract due dates forward")
+    parser.add_argument("--date", type=date.fromisoformat, default=local_today())
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"Rolled {roll_due_dates(args.date, args.batch_size)} contracts forward to {args.date}")
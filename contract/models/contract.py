@@ -1,22 +1,62 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String, text, Date
+from sqlalchemy import BigInteger, Boolean, Column, DDL, Float, ForeignKey, Integer, String, UniqueConstraint, event, func, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import TIMESTAMP
-from configs.database import Base
+from configs.database import Base, next_change_seq, IS_SQLITE
 
 
 class Contract(Base):
     __tablename__ = "contracts"
 
-    id = Column(Integer, primary_key=True, nullable=False, index=True)
-    contract_number = Column(String, nullable=False, unique=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, nullable=False, index=True)
+    contract_number = Column(String, nullable=False)
     loan = Column(Integer, nullable=True)
     interest_rate = Column(Float, nullable=True)
     duration = Column(Integer, nullable=True)
     start_date = Column(Date, nullable=True)
     daily_payment = Column(Integer, nullable=True)
     period = Column(Integer, nullable=True)
+    next_due_date = Column(Date, nullable=True, index=True)
+    next_due_amount = Column(Integer, nullable=True)
     
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    # the partition key has to be part of the primary key; SQLite only autoincrements a lone INTEGER PRIMARY KEY
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=not IS_SQLITE, nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=False, index=True, server_default=next_change_seq(), onupdate=next_change_seq())
 
     customer_id = Column(Integer, ForeignKey('customers.id', ondelete='CASCADE'), nullable=False)
     customer = relationship("Customer", back_populates="contracts")
+
+    __table_args__ = (
+        UniqueConstraint("contract_number") if IS_SQLITE else UniqueConstraint("contract_number", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# contracts.id is no longer unique on its own, so dependents are cleaned up here instead of by FK cascades
+event.listen(
+    Contract.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION contracts_delete_cascade() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        "DELETE FROM payments WHERE contract_id = OLD.id; "
+        "DELETE FROM contract_balances WHERE contract_id = OLD.id; "
+        "DELETE FROM contract_accruals WHERE contract_id = OLD.id; "
+        "RETURN OLD; END $$;"
+        "CREATE TRIGGER contracts_delete_cascade AFTER DELETE ON contracts "
+        "FOR EACH ROW EXECUTE FUNCTION contracts_delete_cascade();"
+    ).execute_if(dialect="postgresql")
+)
+
+event.listen(
+    Contract.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER contracts_delete_cascade AFTER DELETE ON contracts "
+        "FOR EACH ROW BEGIN "
+        "DELETE FROM payments WHERE contract_id = OLD.id; "
+        "DELETE FROM contract_balances WHERE contract_id = OLD.id; "
+        "DELETE FROM contract_accruals WHERE contract_id = OLD.id; "
+        "END"
+    ).execute_if(dialect="sqlite")
+)
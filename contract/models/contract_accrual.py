@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, Boolean, Column, Date, Float, Integer, String, func
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+from configs.database import Base, IS_SQLITE
+
+
+class ContractAccrual(Base):
+    __tablename__ = "contract_accruals"
+
+    as_of_date = Column(Date, primary_key=True, nullable=False)
+    contract_id = Column(Integer, primary_key=True, nullable=False, index=True)
+    accrued_interest = Column(Float, nullable=False)
+    expected_paid = Column(BigInteger, nullable=False)
+    total_paid = Column(BigInteger, nullable=False)
+    overdue_amount = Column(BigInteger, nullable=False)
+    overdue_days = Column(Integer, nullable=False)
+    is_overdue = Column(Boolean, nullable=False)
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+
+class ContractAccrualStaging(Base):
+    # a run writes its chunks here and swaps them into contract_accruals in one transaction at the end,
+    # nothing is lost on a crash that the next run would not rewrite anyway, so PostgreSQL skips the WAL
+    __tablename__ = "contract_accrual_staging"
+    __table_args__ = {} if IS_SQLITE else {"prefixes": ["UNLOGGED"]}
+
+    run_id = Column(String, primary_key=True, nullable=False)
+    as_of_date = Column(Date, nullable=False)
+    contract_id = Column(Integer, primary_key=True, nullable=False)
+    accrued_interest = Column(Float, nullable=False)
+    expected_paid = Column(BigInteger, nullable=False)
+    total_paid = Column(BigInteger, nullable=False)
+    overdue_amount = Column(BigInteger, nullable=False)
+    overdue_days = Column(Integer, nullable=False)
+    is_overdue = Column(Boolean, nullable=False)
@@ -1,30 +1,82 @@
-from fastapi import status, APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Literal, Optional
+from fastapi import status, APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from configs.database import get_db
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from configs.conf import settings
+from configs.database import add_days, days_between, get_db
 from configs.authentication import get_current_user
 from contract.models.contract import Contract
+from contract.models.contract_accrual import ContractAccrual
 from contract.schemas.contract import *
 from customer.models.customer import Customer
 from utils.gen_contract_num import generate_contract_code
+from utils.contract_partition import contract_number_filter
+from utils.contract_archive import find_archived_contracts
+from utils.hot_queries import contract_by_number, customer_by_id
+from utils.etag import etag_headers, make_etag, not_modified, table_version
+from utils.contract_schedule import compute_next_due, local_today
+from utils.change_feed import fetch_changes, record_tombstones
+from utils.audit_log import record_audit, snapshot
+from utils.event_broker import publish_change
+from utils.content_negotiation import negotiate_media_type, tabular_response
+from utils.dashboard_stats import apply_contract_stats
+from utils.templates import DOCUMENT_FORMATS, contract_documents, document_version
+from dashboard.models.dashboard import DailyContractStat
+import io
 import math
+import zipfile
 
 
 router = APIRouter(
     prefix= "/contract",
     tags=["Contract"]
 )
+
+
+EXPORT_COLUMNS = [
+    Contract.id,
+    Contract.contract_number,
+    Contract.customer_id,
+    Contract.loan,
+    Contract.interest_rate,
+    Contract.duration,
+    Contract.start_date,
+    Contract.daily_payment,
+    Contract.period,
+    Contract.next_due_date,
+    Contract.next_due_amount,
+    Contract.created_at,
+    Contract.updated_at,
+    Contract.change_seq
+]
     
 
+def attach_customers(db: Session, contracts: list[dict]):
+    customer_ids = {contract["customer_id"] for contract in contracts}
+    customers = {customer.id: customer for customer in db.query(Customer).filter(Customer.id.in_(customer_ids))}
+    for contract in contracts:
+        contract["customer"] = customers.get(contract["customer_id"])
+
+    return contracts
+
+
 @router.get("/all",
             response_model=ListContractResponse,
             status_code=status.HTTP_200_OK)
-async def get_all_contract(
+def get_all_contract(
+        request: Request,
         db: Session = Depends(get_db),
     ):
 
     try:
+        media_type = negotiate_media_type(request)
+        if media_type:
+            result = db.execute(select(*EXPORT_COLUMNS).order_by(Contract.id))
+            return tabular_response(media_type, EXPORT_COLUMNS, result)
+
         contracts = db.query(Contract).all()
         return ListContractResponse(
             contracts=contracts, 
@@ -42,15 +94,34 @@ async def get_all_contract(
             response_model=ContractPageableResponse, 
             status_code=status.HTTP_200_OK)
 async def get_contract_pageable(
+        request: Request,
+        response: Response,
         page: int = 1,
         page_size: int = 10,
         db: Session = Depends(get_db)
     ): 
 
     try:
-        contracts = db.query(Contract).limit(page_size).offset((page - 1) * page_size).all()
-        total_data = db.query(Contract).count()
+        version = table_version(db, Contract, "contract", Customer)
+        total_data = version[0]
         total_page = math.ceil(total_data / page_size)
+
+        media_type = negotiate_media_type(request)
+        etag = make_etag("contract", version, page, page_size, media_type)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        if media_type:
+            result = db.execute(select(*EXPORT_COLUMNS).order_by(Contract.id).limit(page_size).offset((page - 1) * page_size))
+            return tabular_response(media_type, EXPORT_COLUMNS, result, {
+                "X-Total-Data": str(total_data),
+                "X-Total-Page": str(total_page),
+                **etag_headers(etag)
+            })
+
+        response.headers.update(etag_headers(etag))
+        contracts = db.query(Contract).limit(page_size).offset((page - 1) * page_size).all()
         return ContractPageableResponse(
             contracts=contracts, 
             total_data=total_data, 
@@ -64,23 +135,189 @@ async def get_contract_pageable(
         )
     
 
+@router.get("/changes",
+            response_model=ContractChangesResponse,
+            status_code=status.HTTP_200_OK)
+async def get_contract_changes(
+        since: int = 0,
+        limit: int = 500,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        changes = fetch_changes(db, Contract, "contract", since, limit, joinedload(Contract.customer))
+        return ContractChangesResponse(
+            contracts=changes["updated"],
+            deleted_ids=changes["deleted_ids"],
+            next_since=changes["next_since"],
+            has_more=changes["has_more"]
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/accruals",
+            response_model=ContractAccrualPageableResponse,
+            status_code=status.HTTP_200_OK)
+async def get_contract_accruals(
+        as_of_date: Optional[date] = Query(None, alias="date"),
+        overdue_only: bool = True,
+        page: int = 1,
+        page_size: int = 10,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        accruals = db.query(ContractAccrual).filter(ContractAccrual.as_of_date == (as_of_date or local_today()))
+        if overdue_only:
+            accruals = accruals.filter(ContractAccrual.is_overdue)
+
+        total_data = accruals.count()
+        total_page = math.ceil(total_data / page_size)
+        return ContractAccrualPageableResponse(
+            accruals=accruals.order_by(ContractAccrual.overdue_amount.desc()).limit(page_size).offset((page - 1) * page_size).all(),
+            total_data=total_data,
+            total_page=total_page
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/due",
+            response_model=ContractDueResponse,
+            status_code=status.HTTP_200_OK)
+async def get_contract_due(
+        due_date: Optional[date] = Query(None, alias="date"),
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        due_date = due_date or local_today()
+        query = db.query(Contract).options(joinedload(Contract.customer)).order_by(Contract.customer_id, Contract.id)
+        if due_date == local_today():
+            # the stored date stays on the index; rows roll_due_dates has not moved forward yet are recomputed below
+            candidates = query.filter(Contract.next_due_date <= due_date).all()
+        else:
+            # only the next due date is stored, so other days are derived from the schedule: every period days, and the last day of the term
+            end_date = add_days(Contract.start_date, Contract.duration)
+            candidates = query.filter(
+                Contract.start_date < due_date,
+                Contract.duration > 0,
+                end_date >= due_date,
+                or_(
+                    days_between(literal(due_date), Contract.start_date) % func.coalesce(func.nullif(Contract.period, 0), 1) == 0,
+                    end_date == due_date
+                )
+            ).all()
+
+        contracts = []
+        for contract in candidates:
+            next_due_date, next_due_amount = compute_next_due(
+                contract.start_date,
+                contract.duration,
+                contract.period,
+                contract.daily_payment,
+                due_date
+            )
+            if next_due_date == due_date:
+                contracts.append(ContractResponse.model_validate(contract).model_copy(update={
+                    "next_due_date": next_due_date,
+                    "next_due_amount": next_due_amount
+                }))
+
+        return ContractDueResponse(
+            contracts=contracts,
+            total_data=len(contracts),
+            total_amount=sum(contract.next_due_amount or 0 for contract in contracts)
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/archive",
+            response_model=ListArchivedContractResponse,
+            status_code=status.HTTP_200_OK)
+async def get_archived_contracts(
+        customer_id: int,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        contracts = attach_customers(db, find_archived_contracts(customer_id=customer_id))
+        return ListArchivedContractResponse(
+            contracts=contracts,
+            total_data=len(contracts)
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/archive/{contract_number}",
+            response_model=ArchivedContractResponse,
+            status_code=status.HTTP_200_OK)
+async def get_archived_contract(
+        contract_number: str,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        contracts = find_archived_contracts(contract_number=contract_number)
+        if not contracts:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hợp đồng lưu trữ không tồn tại"
+            )
+
+        return attach_customers(db, contracts[:1])[0]
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
 @router.get("/{contract_number}", 
             status_code=status.HTTP_200_OK,  
             response_model=ContractResponse)
 async def get_contract_by_number(
         contract_number: str,
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db)
     ):
 
     try:
-        contract = db.query(Contract).filter(Contract.contract_number.ilike(contract_number)).first()
+        contract = db.execute(contract_by_number(contract_number)).scalars().first()
         if not contract:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Hợp đồng không tồn tại"
             )
 
-        return ContractResponse(contract=contract)
+        etag = make_etag("contract", contract.id, contract.change_seq, contract.customer.change_seq)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        response.headers.update(etag_headers(etag))
+        return contract
     
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -89,6 +326,97 @@ async def get_contract_by_number(
         )
 
 
+@router.get("/{contract_number}/document",
+            status_code=status.HTTP_200_OK)
+async def get_contract_document(
+        contract_number: str,
+        request: Request,
+        document_format: Literal["docx", "html"] = Query("docx", alias="format"),
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        contract = db.execute(contract_by_number(contract_number)).scalars().first()
+        if not contract:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hợp đồng không tồn tại"
+            )
+
+        etag = make_etag("document", document_version(contract, document_format))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        content, = await contract_documents([contract], document_format)
+        disposition = "inline" if document_format == "html" else "attachment"
+        return Response(
+            content=content,
+            media_type=DOCUMENT_FORMATS[document_format][1],
+            headers={
+                **etag_headers(etag),
+                "Content-Disposition": f'{disposition}; filename="{contract.contract_number}.{document_format}"'
+            }
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.post("/documents",
+             status_code=status.HTTP_200_OK)
+async def get_contract_documents(
+        batch: ContractDocumentBatch,
+        db: Session = Depends(get_db)
+    ):
+
+    contract_numbers = list(dict.fromkeys(number.strip().upper() for number in batch.contract_numbers))
+    if not contract_numbers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Danh sách hợp đồng trống"
+        )
+
+    if len(contract_numbers) > settings.document_batch_limit:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chỉ được in tối đa {settings.document_batch_limit} hợp đồng mỗi lần"
+        )
+
+    try:
+        contracts = db.query(Contract).options(joinedload(Contract.customer)).filter(Contract.contract_number.in_(contract_numbers)).all()
+        contracts_by_number = {contract.contract_number: contract for contract in contracts}
+        missing_numbers = [number for number in contract_numbers if number not in contracts_by_number]
+        if missing_numbers:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Hợp đồng không tồn tại: {missing_numbers}"
+            )
+
+        contracts = [contracts_by_number[number] for number in contract_numbers]
+        documents = await contract_documents(contracts, batch.format)
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for contract, content in zip(contracts, documents):
+                archive.writestr(f"{contract.contract_number}.{batch.format}", content)
+
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="hop-dong.zip"'}
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
 @router.post("/create")
 async def create_contract(
         newContract: ContractCreate,
@@ -96,24 +424,44 @@ async def create_contract(
     ):
 
     try:
-        customer = db.query(Customer).filter(Customer.id == newContract.customer_id).first()
+        customer = db.execute(customer_by_id(newContract.customer_id)).scalars().first()
         if not customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Khách hàng không tồn tại"
             )
 
-        contract = Contract(
-            contract_number=generate_contract_code(db),
-            loan=newContract.loan,
-            interest_rate=newContract.interest_rate,
-            duration=newContract.duration,
-            start_date=newContract.start_date,
-            daily_payment=newContract.daily_payment,
-            period=newContract.period,
-            customer_id=newContract.customer_id
-        )
-        db.add(contract)
+        next_due_date, next_due_amount = compute_next_due(
+            newContract.start_date,
+            newContract.duration,
+            newContract.period,
+            newContract.daily_payment
+        )
+        for attempt in range(1, settings.contract_number_attempts + 1):
+            contract = Contract(
+                contract_number=generate_contract_code(db),
+                loan=newContract.loan,
+                interest_rate=newContract.interest_rate,
+                duration=newContract.duration,
+                start_date=newContract.start_date,
+                daily_payment=newContract.daily_payment,
+                period=newContract.period,
+                next_due_date=next_due_date,
+                next_due_amount=next_due_amount,
+                customer_id=newContract.customer_id
+            )
+            db.add(contract)
+            try:
+                db.flush()
+                break
+            except IntegrityError:
+                # another request committed the same number between the lookup and the insert
+                db.rollback()
+                if attempt == settings.contract_number_attempts:
+                    raise
+        apply_contract_stats(db, 1, Contract.id == contract.id)
+        publish_change(db, "contract", "create", [contract.id])
+        record_audit(db, "contract", "create", contract.id, after=snapshot(contract))
         db.commit()
 
         return JSONResponse(
@@ -139,20 +487,29 @@ async def update_contract(
     ):
 
     try:
-        contract = db.query(Contract).filter(Contract.contract_number.ilike(contract_number))
-        if not contract.first():
+        contract = db.query(Contract).filter(*contract_number_filter(contract_number))
+        existing_contract = contract.first()
+        if not existing_contract:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Hợp đồng không tồn tại"
             )
 
-        customer = db.query(Customer).filter(Customer.id == updateContract.customer_id).first()
+        customer = db.execute(customer_by_id(updateContract.customer_id)).scalars().first()
         if not customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Khách hàng không tồn tại"
             )
 
+        next_due_date, next_due_amount = compute_next_due(
+            updateContract.start_date,
+            updateContract.duration,
+            updateContract.period,
+            updateContract.daily_payment
+        )
+        before = snapshot(existing_contract)
+        apply_contract_stats(db, -1, Contract.id == existing_contract.id)
         contract.update({
             Contract.loan: updateContract.loan,
             Contract.interest_rate: updateContract.interest_rate,
@@ -160,8 +517,13 @@ async def update_contract(
             Contract.start_date: updateContract.start_date,
             Contract.daily_payment: updateContract.daily_payment,
             Contract.period: updateContract.period,
+            Contract.next_due_date: next_due_date,
+            Contract.next_due_amount: next_due_amount,
             Contract.customer_id: updateContract.customer_id
-        })
+        }, synchronize_session="fetch")
+        apply_contract_stats(db, 1, Contract.id == existing_contract.id)
+        publish_change(db, "contract", "update", [existing_contract.id])
+        record_audit(db, "contract", "update", existing_contract.id, before, snapshot(existing_contract))
         db.commit()
 
         return JSONResponse(
@@ -186,14 +548,20 @@ async def delete_contract(
     ):
 
     try:
-        contract = db.query(Contract).filter(Contract.contract_number.ilike(contract_number))
-        if not contract.first():
+        contract = db.query(Contract).filter(*contract_number_filter(contract_number))
+        existing_contract = contract.first()
+        if not existing_contract:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Hợp đồng không tồn tại"
             )
 
-        contract.delete()
+        before = snapshot(existing_contract)
+        deleted_ids = record_tombstones(db, "contract", Contract.id, *contract_number_filter(contract_number), returning=True)
+        apply_contract_stats(db, -1, Contract.id.in_(deleted_ids))
+        contract.delete(synchronize_session="fetch")
+        publish_change(db, "contract", "delete", deleted_ids)
+        record_audit(db, "contract", "delete", before["id"], before=before)
         db.commit()
 
         return JSONResponse(
@@ -219,13 +587,19 @@ async def delete_many_contract(
 
     try:
         contracts = db.query(Contract).filter(Contract.id.in_(deleteMany))
-        if not contracts.first():
+        deleted_contracts = [snapshot(contract) for contract in contracts.all()]
+        if not deleted_contracts:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Hợp đồng không tồn tại"
             )
 
+        deleted_ids = record_tombstones(db, "contract", Contract.id, Contract.id.in_(deleteMany), returning=True)
+        apply_contract_stats(db, -1, Contract.id.in_(deleteMany))
         contracts.delete(synchronize_session=False)
+        publish_change(db, "contract", "delete", deleted_ids)
+        for deleted_contract in deleted_contracts:
+            record_audit(db, "contract", "delete", deleted_contract["id"], before=deleted_contract)
         db.commit()
 
         return JSONResponse(
@@ -256,7 +630,11 @@ async def delete_all_contract(
                 detail="Hợp đồng không tồn tại"
             )
 
-        contracts.delete()
+        record_tombstones(db, "contract", Contract.id)
+        db.query(DailyContractStat).delete()
+        deleted = contracts.delete()
+        publish_change(db, "contract", "delete")
+        record_audit(db, "contract", "delete_all", after={"deleted": deleted})
         db.commit()
 
         return JSONResponse(
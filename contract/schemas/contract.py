@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime, date
 from customer.schemas.customer import CustomerResponse
 
@@ -28,6 +28,8 @@ class ContractUpdate(ContractBase):
 class ContractResponse(ContractBase):
     id: int
     contract_number: str
+    next_due_date: Optional[date] = None
+    next_due_amount: Optional[int] = None
     customer: CustomerResponse
     created_at: datetime
 
@@ -49,4 +51,75 @@ class ContractPageableResponse(ContractBase):
     total_page: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ContractDueResponse(BaseModel):
+    contracts: list[ContractResponse]
+    total_data: int
+    total_amount: int
+
+    class Config:
+        from_attributes = True
+
+
+class ContractChangeResponse(ContractResponse):
+    updated_at: datetime
+    change_seq: int
+
+
+class ContractChangesResponse(BaseModel):
+    contracts: list[ContractChangeResponse]
+    deleted_ids: list[int]
+    next_since: int
+    has_more: bool
+
+    class Config:
+        from_attributes = True
+
+
+class ContractAccrualResponse(BaseModel):
+    as_of_date: date
+    contract_id: int
+    accrued_interest: float
+    expected_paid: int
+    total_paid: int
+    overdue_amount: int
+    overdue_days: int
+    is_overdue: bool
+
+    class Config:
+        from_attributes = True
+
+
+class ContractAccrualPageableResponse(BaseModel):
+    accruals: list[ContractAccrualResponse]
+    total_data: int
+    total_page: int
+
+    class Config:
+        from_attributes = True
+
+
+class ArchivedContractResponse(ContractBase):
+    id: int
+    contract_number: str
+    customer_id: int
+    customer: Optional[CustomerResponse] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ListArchivedContractResponse(BaseModel):
+    contracts: list[ArchivedContractResponse]
+    total_data: int
+
+    class Config:
+        from_attributes = True
+
+
+class ContractDocumentBatch(BaseModel):
+    contract_numbers: list[str]
+    format: Literal["docx", "html"] = "docx"
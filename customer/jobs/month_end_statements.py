@@ -0,0 +1,218 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_, select
+from configs.conf import settings
+from configs.database import engine
+from contract.models.contract import Contract
+from customer.models.customer import Customer
+from payment.models.payment import Payment
+from utils.contract_schedule import TIMEZONE, compute_expected_paid, compute_total_due, local_today
+from utils.process_pool import init_worker
+from utils.templates import format_date, format_money, template_lookup
+
+
+STATEMENT_TEMPLATE = "customer_statement.html.mako"
+
+CUSTOMER_COLUMNS = [Customer.id, Customer.full_name, Customer.cccd, Customer.phone_number, Customer.address]
+CONTRACT_COLUMNS = [
+    Contract.contract_number,
+    Contract.loan,
+    Contract.duration,
+    Contract.period,
+    Contract.start_date,
+    Contract.daily_payment
+]
+
+
+def month_end(month: date):
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def end_of_day(day: date):
+    # SQLite keeps CURRENT_TIMESTAMP in UTC without an offset, so the bound is given in UTC for both dialects
+    return TIMEZONE.localize(datetime(day.year, day.month, day.day) + timedelta(days=1)).astimezone(timezone.utc)
+
+
+def statement_dir(month: date):
+    return os.path.join(settings.statement_dir, f"{month:%Y-%m}")
+
+
+def checkpoint_path(output_dir: str):
+    return os.path.join(output_dir, "checkpoint.json")
+
+
+def read_checkpoint(output_dir: str):
+    try:
+        with open(checkpoint_path(output_dir), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"last_customer_id": 0, "statements": 0, "contracts": 0, "completed": False}
+
+
+def write_checkpoint(output_dir: str, checkpoint: dict):
+    path = checkpoint_path(output_dir)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def stream_customer_contracts(connection, after_customer_id: int, as_of: date):
+    # one ordered pass over customers joined with their contracts, read through a server-side cursor.
+    # Everything is as of the end of the month: ContractBalance already counts later payments
+    cutoff = end_of_day(as_of)
+    paid = select(
+        Payment.contract_id,
+        func.sum(Payment.amount).label("total_paid")
+    ).where(
+        Payment.paid_date <= as_of
+    ).group_by(Payment.contract_id).subquery()
+
+    result = connection.execute(
+        select(
+            *CUSTOMER_COLUMNS,
+            Contract.id.label("contract_id"),
+            *CONTRACT_COLUMNS,
+            func.coalesce(paid.c.total_paid, 0).label("total_paid")
+        ).outerjoin(
+            Contract, and_(
+                Contract.customer_id == Customer.id,
+                Contract.created_at < cutoff,
+                or_(Contract.start_date.is_(None), Contract.start_date <= as_of)
+            )
+        ).outerjoin(
+            paid, paid.c.contract_id == Contract.id
+        ).where(
+            Customer.id > after_customer_id,
+            Customer.created_at < cutoff
+        ).order_by(Customer.id, Contract.id),
+        execution_options={"stream_results": True, "yield_per": settings.statement_fetch_size}
+    )
+
+    for customer_id, rows in itertools.groupby(result, key=lambda row: row.id):
+        rows = list(rows)
+        yield {
+            "customer": {column.key: getattr(rows[0], column.key) for column in CUSTOMER_COLUMNS},
+            "contracts": [
+                {**{column.key: getattr(row, column.key) for column in CONTRACT_COLUMNS}, "total_paid": row.total_paid}
+                for row in rows if row.contract_id is not None
+            ]
+        }
+
+
+def contract_status(contract: dict, total_due: int, as_of: date):
+    if contract["total_paid"] >= total_due:
+        return "Đã tất toán"
+    if not contract["start_date"] or contract["start_date"] > as_of:
+        return "Chưa bắt đầu"
+    expected_paid = compute_expected_paid(
+        contract["start_date"],
+        contract["duration"],
+        contract["period"],
+        contract["daily_payment"],
+        as_of
+    )
+    return "Quá hạn" if contract["total_paid"] < expected_paid else "Đang vay"
+
+
+def render_statements(statements: list, output_dir: str, as_of: date):
+    template = template_lookup.get_template(STATEMENT_TEMPLATE)
+    for statement in statements:
+        contracts = []
+        total_remaining = 0
+        for contract in statement["contracts"]:
+            total_due = compute_total_due(contract["loan"], contract["duration"], contract["daily_payment"])
+            remaining = max(total_due - contract["total_paid"], 0)
+            total_remaining += remaining
+            contracts.append({
+                "contract_number": contract["contract_number"],
+                "start_date": format_date(contract["start_date"]),
+                "loan": format_money(contract["loan"]),
+                "total_due": format_money(total_due),
+                "total_paid": format_money(contract["total_paid"]),
+                "remaining": format_money(remaining),
+                "status": contract_status(contract, total_due, as_of)
+            })
+
+        path = os.path.join(output_dir, f"{statement['customer']['id']}.html")
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(template.render(
+                customer=statement["customer"],
+                contracts=contracts,
+                total_remaining=format_money(total_remaining),
+                period=f"{as_of:%m/%Y}",
+                as_of=format_date(as_of)
+            ).encode("utf-8"))
+        os.replace(f"{path}.tmp", path)
+
+    return len(statements), sum(len(statement["contracts"]) for statement in statements)
+
+
+def run_month_end_statements(month: date, batch_size: int = 1000, workers: int = 4, restart: bool = False, progress=None):
+    as_of = month_end(month)
+    output_dir = statement_dir(as_of)
+    os.makedirs(output_dir, exist_ok=True)
+
+    checkpoint = {"last_customer_id": 0, "statements": 0, "contracts": 0, "completed": False}
+    if not restart:
+        checkpoint = read_checkpoint(output_dir)
+    if checkpoint["completed"]:
+        return checkpoint
+
+    started = time.monotonic()
+    with engine.connect() as connection:
+        total_customers = checkpoint["statements"] + connection.execute(
+            select(func.count(Customer.id)).where(Customer.id > checkpoint["last_customer_id"], Customer.created_at < end_of_day(as_of))
+        ).scalar()
+
+        # batches finish out of order, so the checkpoint only moves past the oldest batch still pending
+        pending = deque()
+
+        def finish_oldest():
+            last_customer_id, future = pending.popleft()
+            statements, contracts = future.result()
+            checkpoint["last_customer_id"] = last_customer_id
+            checkpoint["statements"] += statements
+            checkpoint["contracts"] += contracts
+            write_checkpoint(output_dir, checkpoint)
+
+            elapsed = time.monotonic() - started
+            print(f"[{checkpoint['statements']}/{total_customers}] {checkpoint['contracts']} contracts, {elapsed:.1f}s")
+            if progress:
+                progress(checkpoint["statements"], total_customers, f"{checkpoint['statements']} statements")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            statements = stream_customer_contracts(connection, checkpoint["last_customer_id"], as_of)
+            while True:
+                batch = list(itertools.islice(statements, batch_size))
+                if not batch:
+                    break
+
+                pending.append((batch[-1]["customer"]["id"], pool.submit(render_statements, batch, output_dir, as_of)))
+                # bound the rendered-but-unwritten work so memory stays flat while the cursor is read
+                while len(pending) > workers * 2 or (pending and pending[0][1].done()):
+                    finish_oldest()
+
+            while pending:
+                finish_oldest()
+
+    checkpoint["completed"] = True
+    write_checkpoint(output_dir, checkpoint)
+    return checkpoint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render one month-end statement per customer")
+    parser.add_argument("--month", type=date.fromisoformat, default=local_today().replace(day=1) - timedelta(days=1), help="any day of the month")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and render every statement again")
+    args = parser.parse_args()
+
+    checkpoint = run_month_end_statements(args.month, args.batch_size, args.workers, args.restart)
+    print(f"Wrote {checkpoint['statements']} statements ({checkpoint['contracts']} contracts) to {statement_dir(month_end(args.month))}")
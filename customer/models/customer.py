@@ -1,7 +1,7 @@
-from sqlalchemy import Boolean, Column, Integer, String, text, Date
+from sqlalchemy import BigInteger, Boolean, Column, Computed, DDL, Index, Integer, String, event, func, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import TIMESTAMP
-from configs.database import Base
+from configs.database import Base, next_change_seq
 
 
 class Customer(Base):
@@ -14,7 +14,37 @@ class Customer(Base):
     phone_number = Column(String, nullable=True)
     address = Column(String, nullable=True)
     is_new = Column(Boolean, default=True, nullable=True)
-    
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
 
-    contracts = relationship("Contract", back_populates="customer", uselist=True)
\ No newline at end of file
+    full_name_search = Column(String, Computed("lower(f_unaccent(full_name))", persisted=True))
+    address_search = Column(String, Computed("lower(f_unaccent(address))", persisted=True))
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=False, index=True, server_default=next_change_seq(), onupdate=next_change_seq())
+
+    contracts = relationship("Contract", back_populates="customer", uselist=True)
+
+    __table_args__ = (
+        Index("ix_customers_full_name_search_trgm", "full_name_search",
+              postgresql_using="gin", postgresql_ops={"full_name_search": "gin_trgm_ops"}),
+        Index("ix_customers_address_search_trgm", "address_search",
+              postgresql_using="gin", postgresql_ops={"address_search": "gin_trgm_ops"}),
+        Index("ix_customers_phone_number_trgm", "phone_number",
+              postgresql_using="gin", postgresql_ops={"phone_number": "gin_trgm_ops"}),
+        Index("ix_customers_cccd_trgm", "cccd",
+              postgresql_using="gin", postgresql_ops={"cccd": "gin_trgm_ops"}),
+    )
+
+
+# unaccent() is only STABLE, so generated columns and indexes go through an IMMUTABLE wrapper
+event.listen(
+    Customer.__table__,
+    "before_create",
+    DDL(
+        "CREATE EXTENSION IF NOT EXISTS unaccent;"
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;"
+    ).execute_if(dialect="postgresql")
+)
@@ -1,13 +1,24 @@
 import shutil
 from typing import List
-from fastapi import File, UploadFile, status, APIRouter, Depends, HTTPException, status
+from fastapi import File, Request, Response, UploadFile, status, APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
+from sqlalchemy import and_, case, func, or_, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from configs.database import get_db
+from configs.database import IS_SQLITE, add_days, get_db
 from configs.authentication import get_current_user
 from customer.models.customer import Customer
 from customer.schemas.customer import *
+from contract.models.contract import Contract
+from utils.contract_schedule import local_today
+from utils.change_feed import fetch_changes, record_tombstones
+from utils.audit_log import record_audit, snapshot
+from utils.event_broker import publish_change
+from utils.content_negotiation import negotiate_media_type, tabular_response
+from utils.dashboard_stats import apply_contract_stats, apply_customer_stats
+from utils.hot_queries import customer_by_id
+from utils.etag import etag_headers, make_etag, not_modified, table_version
+from dashboard.models.dashboard import DailyContractStat, DailyCustomerStat
 import math
 import os
 
@@ -20,16 +31,58 @@ router = APIRouter(
     prefix= "/customer",
     tags=["Customer"]
 )
+
+
+EXPORT_COLUMNS = [
+    Customer.id,
+    Customer.full_name,
+    Customer.cccd,
+    Customer.phone_number,
+    Customer.address,
+    Customer.is_new,
+    Customer.created_at,
+    Customer.updated_at,
+    Customer.change_seq
+]
+
+
+def query_customer_overview(db: Session):
+    today = local_today()
+    is_active = and_(Contract.start_date <= today, add_days(Contract.start_date, Contract.duration) >= today)
+
+    return db.query(
+        Customer,
+        func.count(Contract.id).label("total_contracts"),
+        func.coalesce(func.sum(Contract.loan), 0).label("total_loan"),
+        func.count(Contract.id).filter(is_active).label("active_contracts"),
+        func.min(Contract.next_due_date).label("next_due_date")
+    ).outerjoin(Customer.contracts).group_by(Customer.id)
+
+
+def to_customer_overview(row):
+    customer, total_contracts, total_loan, active_contracts, next_due_date = row
+    return CustomerOverviewResponse.model_validate(customer).model_copy(update={
+        "total_contracts": total_contracts,
+        "total_loan": total_loan,
+        "active_contracts": active_contracts,
+        "next_due_date": next_due_date
+    })
     
 
 @router.get("/all",
             response_model=ListCustomerResponse,
             status_code=status.HTTP_200_OK)
-async def get_all_customer(
+def get_all_customer(
+        request: Request,
         db: Session = Depends(get_db),
     ):
 
     try:
+        media_type = negotiate_media_type(request)
+        if media_type:
+            result = db.execute(select(*EXPORT_COLUMNS).order_by(Customer.id))
+            return tabular_response(media_type, EXPORT_COLUMNS, result)
+
         customers = db.query(Customer).all()
         return ListCustomerResponse(
             customers=customers, 
@@ -47,14 +100,33 @@ async def get_all_customer(
             response_model=CustomerPageableResponse, 
             status_code=status.HTTP_200_OK)
 async def get_customer_pageable(
+        request: Request,
+        response: Response,
         page: int = 1,
         page_size: int = 10,
         db: Session = Depends(get_db)
     ):
 
     try:
-        total = db.query(Customer).count()
+        version = table_version(db, Customer, "customer")
+        total = version[0]
         total_page = math.ceil(total / page_size)
+
+        media_type = negotiate_media_type(request)
+        etag = make_etag("customer", version, page, page_size, media_type)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        if media_type:
+            result = db.execute(select(*EXPORT_COLUMNS).order_by(Customer.id).limit(page_size).offset((page - 1) * page_size))
+            return tabular_response(media_type, EXPORT_COLUMNS, result, {
+                "X-Total-Data": str(total),
+                "X-Total-Page": str(total_page),
+                **etag_headers(etag)
+            })
+
+        response.headers.update(etag_headers(etag))
         customers = db.query(Customer).limit(page_size).offset((page - 1) * page_size).all()
         return CustomerPageableResponse(
             total_data=total,
@@ -69,22 +141,143 @@ async def get_customer_pageable(
         )
     
 
+@router.get("/changes",
+            response_model=CustomerChangesResponse,
+            status_code=status.HTTP_200_OK)
+async def get_customer_changes(
+        since: int = 0,
+        limit: int = 500,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        changes = fetch_changes(db, Customer, "customer", since, limit)
+        return CustomerChangesResponse(
+            customers=changes["updated"],
+            deleted_ids=changes["deleted_ids"],
+            next_since=changes["next_since"],
+            has_more=changes["has_more"]
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/overview/pageable",
+            response_model=CustomerOverviewPageableResponse,
+            status_code=status.HTTP_200_OK)
+async def get_customer_overview_pageable(
+        page: int = 1,
+        page_size: int = 10,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        total = db.query(Customer).count()
+        total_page = math.ceil(total / page_size)
+        page_ids = db.query(Customer.id).order_by(Customer.id).limit(page_size).offset((page - 1) * page_size).subquery()
+        rows = query_customer_overview(db).filter(Customer.id.in_(page_ids.select())).order_by(Customer.id).all()
+        return CustomerOverviewPageableResponse(
+            total_data=total,
+            total_page=total_page,
+            customers=[to_customer_overview(row) for row in rows]
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/search",
+            response_model=CustomerSearchResponse,
+            status_code=status.HTTP_200_OK)
+async def search_customer(
+        keyword: str,
+        limit: int = 20,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        keyword = keyword.strip()
+        if not keyword:
+            return CustomerSearchResponse(customers=[], total_data=0)
+
+        digits = keyword.replace(" ", "").replace(".", "")
+        if digits.isdigit():
+            score = case(
+                (or_(Customer.phone_number == digits, Customer.cccd == digits), 1.0),
+                else_=0.5
+            )
+            condition = or_(
+                Customer.phone_number.contains(digits, autoescape=True),
+                Customer.cccd.contains(digits, autoescape=True)
+            )
+        else:
+            term = func.lower(func.f_unaccent(keyword))
+            score = func.greatest(
+                func.word_similarity(term, Customer.full_name_search),
+                func.word_similarity(term, Customer.address_search) * 0.5
+            )
+            if IS_SQLITE:
+                # no pg_trgm operators, compare against its default word_similarity_threshold instead
+                condition = or_(
+                    func.word_similarity(term, Customer.full_name_search) >= 0.6,
+                    func.word_similarity(term, Customer.address_search) >= 0.6
+                )
+            else:
+                condition = or_(
+                    term.op("<%")(Customer.full_name_search),
+                    term.op("<%")(Customer.address_search)
+                )
+
+        rows = db.query(Customer, score).filter(condition).order_by(score.desc(), Customer.id).limit(limit).all()
+
+        customers = [
+            CustomerSearchResult.model_validate(customer).model_copy(update={"score": rank})
+            for customer, rank in rows
+        ]
+        return CustomerSearchResponse(
+            customers=customers,
+            total_data=len(customers)
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
 @router.get("/{customer_id}", 
             status_code=status.HTTP_200_OK,  
             response_model=CustomerResponse)
 async def get_customer_by_id(
         customer_id: int, 
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db)
     ):
 
     try:
-        customer = db.query(Customer).filter(Customer.id == customer_id).first()
+        customer = db.execute(customer_by_id(customer_id)).scalars().first()
         if not customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Không tìm thấy khách hàng"
             )
-        return CustomerResponse(customer=customer)
+
+        etag = make_etag("customer", customer.id, customer.change_seq)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        response.headers.update(etag_headers(etag))
+        return customer
     
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -93,6 +286,30 @@ async def get_customer_by_id(
         )
     
 
+@router.get("/{customer_id}/overview",
+            status_code=status.HTTP_200_OK,
+            response_model=CustomerOverviewResponse)
+async def get_customer_overview(
+        customer_id: int,
+        db: Session = Depends(get_db)
+    ):
+
+    try:
+        row = query_customer_overview(db).filter(Customer.id == customer_id).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Không tìm thấy khách hàng"
+            )
+        return to_customer_overview(row)
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
 @router.post("/create")
 async def create_customer(
         newCustomer: CustomerCreate, 
@@ -115,6 +332,10 @@ async def create_customer(
             is_new=newCustomer.is_new
         )
         db.add(customer)
+        db.flush()
+        apply_customer_stats(db, 1, Customer.id == customer.id)
+        publish_change(db, "customer", "create", [customer.id])
+        record_audit(db, "customer", "create", customer.id, after=snapshot(customer))
         db.commit()
 
         return JSONResponse(
@@ -140,7 +361,7 @@ def upload_cccd_image(
     ):
     
     try:
-        customer = db.query(Customer).filter(Customer.id == customer_id).first()
+        customer = db.execute(customer_by_id(customer_id)).scalars().first()
         if not customer:
             raise HTTPException(status_code=404, detail="Khách hàng không tồn tại")
 
@@ -149,7 +370,10 @@ def upload_cccd_image(
         with open(file_path, "wb") as f:
             shutil.copyfileobj(cccd_image.file, f)
 
+        before = snapshot(customer)
         customer.cccd_path = file_path
+        publish_change(db, "customer", "update", [customer.id])
+        record_audit(db, "customer", "update", customer.id, before, snapshot(customer))
         db.commit()
 
         return JSONResponse(
@@ -176,13 +400,19 @@ async def update_customer(
     
     try:
         customer = db.query(Customer).filter(Customer.id == customer_id)
-        if not customer.first():
+        existing_customer = customer.first()
+        if not existing_customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Khách hàng không tồn tại"
             )
 
+        before = snapshot(existing_customer)
+        apply_customer_stats(db, -1, Customer.id == customer_id)
         customer.update(updateCustomer.dict())
+        apply_customer_stats(db, 1, Customer.id == customer_id)
+        publish_change(db, "customer", "update", [customer_id])
+        record_audit(db, "customer", "update", customer_id, before, snapshot(existing_customer, **updateCustomer.dict()))
         db.commit()
 
         return JSONResponse(
@@ -208,13 +438,24 @@ async def delete_customer(
 
     try:
         customer = db.query(Customer).filter(Customer.id == customer_id)
-        if not customer.first():
+        existing_customer = customer.first()
+        if not existing_customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Khách hàng không tồn tại"
             )
 
+        before = snapshot(existing_customer)
+        contract_ids = record_tombstones(db, "contract", Contract.id, Contract.customer_id == customer_id, returning=True)
+        record_tombstones(db, "customer", Customer.id, Customer.id == customer_id)
+        apply_contract_stats(db, -1, Contract.customer_id == customer_id)
+        apply_customer_stats(db, -1, Customer.id == customer_id)
         customer.delete()
+        publish_change(db, "contract", "delete", contract_ids)
+        publish_change(db, "customer", "delete", [customer_id])
+        for contract_id in contract_ids:
+            record_audit(db, "contract", "delete", contract_id)
+        record_audit(db, "customer", "delete", customer_id, before=before)
         db.commit()
 
         return JSONResponse(
@@ -240,13 +481,24 @@ async def delete_many_customer(
 
     try:
         customers = db.query(Customer).filter(Customer.id.in_(customer_ids))
-        if not customers.first():
+        deleted_customers = [snapshot(customer) for customer in customers.all()]
+        if not deleted_customers:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Khách hàng không tồn tại"
             )
 
+        contract_ids = record_tombstones(db, "contract", Contract.id, Contract.customer_id.in_(customer_ids), returning=True)
+        deleted_ids = record_tombstones(db, "customer", Customer.id, Customer.id.in_(customer_ids), returning=True)
+        apply_contract_stats(db, -1, Contract.customer_id.in_(customer_ids))
+        apply_customer_stats(db, -1, Customer.id.in_(customer_ids))
         customers.delete(synchronize_session=False)
+        publish_change(db, "contract", "delete", contract_ids)
+        publish_change(db, "customer", "delete", deleted_ids)
+        for contract_id in contract_ids:
+            record_audit(db, "contract", "delete", contract_id)
+        for deleted_customer in deleted_customers:
+            record_audit(db, "customer", "delete", deleted_customer["id"], before=deleted_customer)
         db.commit()
 
         return JSONResponse(
@@ -270,7 +522,14 @@ async def delete_all_customer(
     ):
 
     try:
-        db.query(Customer).delete()
+        record_tombstones(db, "contract", Contract.id)
+        record_tombstones(db, "customer", Customer.id)
+        db.query(DailyContractStat).delete()
+        db.query(DailyCustomerStat).delete()
+        deleted = db.query(Customer).delete()
+        publish_change(db, "contract", "delete")
+        publish_change(db, "customer", "delete")
+        record_audit(db, "customer", "delete_all", after={"deleted": deleted})
         db.commit()
 
         return JSONResponse(
@@ -47,3 +47,47 @@ class CustomerPageableResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CustomerSearchResult(CustomerResponse):
+    score: float = 0
+
+
+class CustomerSearchResponse(BaseModel):
+    customers: list[CustomerSearchResult]
+    total_data: int
+
+    class Config:
+        from_attributes = True
+
+
+class CustomerOverviewResponse(CustomerResponse):
+    total_contracts: int = 0
+    total_loan: int = 0
+    active_contracts: int = 0
+    next_due_date: Optional[date] = None
+
+
+class CustomerOverviewPageableResponse(BaseModel):
+    customers: list[CustomerOverviewResponse]
+
+    total_page: int
+    total_data: int
+
+    class Config:
+        from_attributes = True
+
+
+class CustomerChangeResponse(CustomerResponse):
+    updated_at: datetime
+    change_seq: int
+
+
+class CustomerChangesResponse(BaseModel):
+    customers: list[CustomerChangeResponse]
+    deleted_ids: list[int]
+    next_since: int
+    has_more: bool
+
+    class Config:
+        from_attributes = True
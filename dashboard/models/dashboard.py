@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, Date, Integer, text
+from configs.database import Base
+
+
+class DailyCustomerStat(Base):
+    __tablename__ = "daily_customer_stats"
+
+    day = Column(Date, primary_key=True, nullable=False)
+    new_customers = Column(Integer, nullable=False, server_default=text('0'))
+    new_is_new = Column(Integer, nullable=False, server_default=text('0'))
+
+
+class DailyContractStat(Base):
+    __tablename__ = "daily_contract_stats"
+
+    day = Column(Date, primary_key=True, nullable=False)
+    contracts_opened = Column(Integer, nullable=False, server_default=text('0'))
+    loan_volume = Column(BigInteger, nullable=False, server_default=text('0'))
@@ -0,0 +1,112 @@
+from typing import Literal
+from datetime import date
+from fastapi import status, APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from configs.database import get_db
+from configs.authentication import get_current_admin, get_current_user
+from dashboard.models.dashboard import DailyContractStat, DailyCustomerStat
+from dashboard.schemas.dashboard import *
+from utils.job_queue import enqueue
+import utils.job_tasks
+
+
+router = APIRouter(
+    prefix= "/dashboard",
+    tags=["Dashboard"]
+)
+
+
+@router.get("/customers",
+            response_model=CustomerStatsResponse,
+            status_code=status.HTTP_200_OK)
+async def get_customer_stats(
+        start_date: date,
+        end_date: date,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        stats = db.query(DailyCustomerStat).filter(
+            DailyCustomerStat.day >= start_date,
+            DailyCustomerStat.day <= end_date
+        ).order_by(DailyCustomerStat.day).all()
+
+        return CustomerStatsResponse(
+            stats=stats,
+            total_customers=sum(stat.new_customers for stat in stats),
+            total_is_new=sum(stat.new_is_new for stat in stats)
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/contracts",
+            response_model=ContractStatsResponse,
+            status_code=status.HTTP_200_OK)
+async def get_contract_stats(
+        start_date: date,
+        end_date: date,
+        granularity: Literal["day", "month"] = "day",
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        day = DailyContractStat.day
+        if granularity == "month":
+            day = cast(func.date_trunc("month", DailyContractStat.day), Date)
+
+        stats = db.query(
+            day.label("day"),
+            func.sum(DailyContractStat.contracts_opened).label("contracts_opened"),
+            func.sum(DailyContractStat.loan_volume).label("loan_volume")
+        ).filter(
+            DailyContractStat.day >= start_date,
+            DailyContractStat.day <= end_date
+        ).group_by(day).order_by(day).all()
+
+        return ContractStatsResponse(
+            stats=stats,
+            total_contracts=sum(stat.contracts_opened for stat in stats),
+            total_loan_volume=sum(stat.loan_volume for stat in stats)
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.post("/rebuild")
+async def rebuild_stats(
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_admin)
+    ):
+
+    try:
+        job = enqueue(db, "dashboard.rebuild", created_by=current_user.id)
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": "Đã tạo tác vụ tổng hợp lại số liệu",
+                "job_id": job.id
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from datetime import date
+
+
+class DailyCustomerStatResponse(BaseModel):
+    day: date
+    new_customers: int
+    new_is_new: int
+
+    class Config:
+        from_attributes = True
+
+
+class CustomerStatsResponse(BaseModel):
+    stats: list[DailyCustomerStatResponse]
+    total_customers: int
+    total_is_new: int
+
+    class Config:
+        from_attributes = True
+
+
+class ContractStatResponse(BaseModel):
+    day: date
+    contracts_opened: int
+    loan_volume: int
+
+    class Config:
+        from_attributes = True
+
+
+class ContractStatsResponse(BaseModel):
+    stats: list[ContractStatResponse]
+    total_contracts: int
+    total_loan_volume: int
+
+    class Config:
+        from_attributes = True
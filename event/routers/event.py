@@ -0,0 +1,56 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from configs.conf import settings
+from utils.event_broker import broker
+
+
+router = APIRouter(
+    prefix= "/event",
+    tags=["Event"]
+)
+
+
+@router.get("/stream")
+async def stream_events(
+        topics: Optional[str] = None
+    ):
+
+    subscribed_topics = {topic.strip() for topic in topics.split(",") if topic.strip()} if topics else set()
+    queue = broker.subscribe(subscribed_topics)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=settings.event_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if frame is None:
+                    break
+                yield frame
+
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.get("/stats")
+async def get_event_stats():
+    return {
+        "subscribers": len(broker.subscribers),
+        "published": broker.published,
+        "dropped": broker.dropped
+    }
@@ -0,0 +1,37 @@
+from sqlalchemy import JSON, BigInteger, Column, Float, ForeignKey, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+from configs.database import Base
+
+
+JSON_DOCUMENT = JSON().with_variant(JSONB, "postgresql")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, nullable=False)
+    queue = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    payload = Column(JSON_DOCUMENT, nullable=False, server_default=text("'{}'"))
+    status = Column(String, nullable=False, server_default=text("'queued'"), index=True)
+    attempts = Column(Integer, nullable=False, server_default=text('0'))
+    max_attempts = Column(Integer, nullable=False, server_default=text('3'))
+    progress = Column(Float, nullable=False, server_default=text('0'))
+    message = Column(String, nullable=True)
+    result = Column(JSON_DOCUMENT, nullable=True)
+    error = Column(String, nullable=True)
+    run_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_by = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_queued", "queue", "run_at", "id", postgresql_where=text("status = 'queued'"),
+              sqlite_where=text("status = 'queued'")),
+    )
@@ -0,0 +1,200 @@
+from typing import Optional
+from fastapi import status, APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from configs.database import get_db
+from configs.authentication import get_current_admin, get_current_user
+from job.models.job import Job
+from job.schemas.job import *
+from utils.event_broker import publish_change
+from utils.job_queue import TASKS, enqueue
+import utils.job_tasks
+import math
+
+
+router = APIRouter(
+    prefix= "/job",
+    tags=["Job"]
+)
+
+
+@router.get("/pageable",
+            response_model=JobPageableResponse,
+            status_code=status.HTTP_200_OK)
+async def get_job_pageable(
+        job_status: Optional[str] = Query(None, alias="status"),
+        queue: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        jobs = db.query(Job)
+        if job_status:
+            jobs = jobs.filter(Job.status == job_status)
+        if queue:
+            jobs = jobs.filter(Job.queue == queue)
+
+        total_count = jobs.count()
+        total_page = math.ceil(total_count / page_size)
+        jobs = jobs.order_by(Job.id.desc()).limit(page_size).offset((page - 1) * page_size).all()
+
+        return JobPageableResponse(
+            jobs=jobs,
+            total_page=total_page,
+            total_data=total_count
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/{job_id}",
+            response_model=JobResponse,
+            status_code=status.HTTP_200_OK)
+async def get_job_by_id(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tác vụ không tồn tại"
+            )
+
+        return job
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.post("/create")
+async def create_job(
+        newJob: JobCreate,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_admin)
+    ):
+
+    try:
+        if newJob.name not in TASKS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Loại tác vụ không hợp lệ"
+            )
+
+        unknown = [key for key in newJob.payload if key not in TASKS[newJob.name]["parameters"]]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tham số không hợp lệ: {', '.join(unknown)}"
+            )
+
+        job = enqueue(db, newJob.name, newJob.payload, current_user.id)
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": "Tạo tác vụ thành công",
+                "job_id": job.id
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.put("/retry/{job_id}")
+async def retry_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_admin)
+    ):
+
+    try:
+        retried = db.query(Job).filter(Job.id == job_id, Job.status.in_(["failed", "cancelled"])).update({
+            Job.status: "queued",
+            Job.attempts: 0,
+            Job.progress: 0,
+            Job.error: None,
+            Job.run_at: func.now(),
+            Job.finished_at: None
+        }, synchronize_session=False)
+        if not retried:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Chỉ có thể chạy lại tác vụ lỗi hoặc đã hủy"
+            )
+
+        publish_change(db, "job", "queued", [job_id])
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "message": "Đã đưa tác vụ vào hàng đợi"
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.put("/cancel/{job_id}")
+async def cancel_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_admin)
+    ):
+
+    try:
+        cancelled = db.query(Job).filter(Job.id == job_id, Job.status.in_(["queued", "running"])).update({
+            Job.status: "cancelled",
+            Job.locked_by: None,
+            Job.locked_at: None,
+            Job.finished_at: func.now()
+        }, synchronize_session=False)
+        if not cancelled:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Tác vụ đã kết thúc"
+            )
+
+        publish_change(db, "job", "cancelled", [job_id])
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "message": "Hủy tác vụ thành công"
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+
+
+class JobCreate(BaseModel):
+    name: str
+    payload: dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    id: int
+    queue: str
+    name: str
+    payload: dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    progress: float
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    run_at: datetime
+    created_by: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobPageableResponse(BaseModel):
+    jobs: list[JobResponse]
+    total_page: int
+    total_data: int
+
+    class Config:
+        from_attributes = True
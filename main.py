@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,15 +10,58 @@ from auth_credential.routers import auth_credential
 from authen.routers import authen
 from customer.routers import customer
 from contract.routers import contract
+from payment.routers import payment
+from event.routers import event
+from dashboard.routers import dashboard
+from job.routers import job
+from admin.routers import admin
+from utils.event_broker import pg_listener
+from utils.job_queue import job_runner
+from utils.process_pool import shutdown_process_pool
+from utils.admission import AdmissionMiddleware
+from utils.query_deadline import QueryDeadlineMiddleware
+from utils.single_flight import SingleFlightMiddleware
+from utils.profiling import ProfilingMiddleware
+from utils.slow_queries import RequestScopeMiddleware
+from utils.contract_partition import ensure_contract_partitions
+from utils.audit_log import audit_buffer, ensure_audit_partitions
 import uvicorn
 
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+with engine.begin() as connection:
+    ensure_contract_partitions(connection)
+    ensure_audit_partitions(connection)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await pg_listener.start()
+    await job_runner.start()
+    audit_buffer.start()
+    yield
+    job_runner.stop()
+    pg_listener.stop()
+    await asyncio.to_thread(audit_buffer.stop)
+    shutdown_process_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+app.add_middleware(QueryDeadlineMiddleware)
+
+app.add_middleware(AdmissionMiddleware)
+
+app.add_middleware(SingleFlightMiddleware)
+
+app.add_middleware(RequestScopeMiddleware)
+
 origins = [
     '*'
 ]
@@ -40,6 +85,11 @@ app.router.include_router(auth_credential.router)
 app.router.include_router(authen.router)
 app.router.include_router(customer.router)
 app.router.include_router(contract.router)
+app.router.include_router(payment.router)
+app.router.include_router(event.router)
+app.router.include_router(dashboard.router)
+app.router.include_router(job.router)
+app.router.include_router(admin.router)
 
 
 # if __name__ == "__main__":
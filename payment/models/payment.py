@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, Date, ForeignKey, Index, Integer, String, func, text
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+from configs.database import Base
+
+
+class Payment(Base):
+    __tablename__ = "payments"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, nullable=False)
+    contract_id = Column(Integer, nullable=False)
+    amount = Column(Integer, nullable=False)
+    paid_date = Column(Date, nullable=False)
+    note = Column(String, nullable=True)
+    collected_by = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_payments_contract_id_id", "contract_id", "id"),
+    )
+
+
+class ContractBalance(Base):
+    __tablename__ = "contract_balances"
+
+    contract_id = Column(Integer, primary_key=True, nullable=False)
+    total_paid = Column(BigInteger, nullable=False, server_default=text('0'))
+    payment_count = Column(Integer, nullable=False, server_default=text('0'))
+    last_paid_date = Column(Date, nullable=True)
+
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
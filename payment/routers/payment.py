@@ -0,0 +1,206 @@
+from fastapi import status, APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from configs.database import get_db, upsert
+from configs.authentication import get_current_user
+from contract.models.contract import Contract
+from payment.models.payment import Payment, ContractBalance
+from payment.schemas.payment import *
+from utils.contract_schedule import compute_expected_paid, compute_total_due, local_today
+import math
+
+
+router = APIRouter(
+    prefix= "/payment",
+    tags=["Payment"]
+)
+
+
+def post_payments(db: Session, payments: list[PaymentCreate], collected_by: int = None):
+    if not payments:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Danh sách thanh toán trống"
+        )
+
+    if any(payment.amount <= 0 for payment in payments):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Số tiền thanh toán không hợp lệ"
+        )
+
+    contract_ids = {payment.contract_id for payment in payments}
+    existing_ids = {contract_id for contract_id, in db.query(Contract.id).filter(Contract.id.in_(contract_ids))}
+    missing_ids = contract_ids - existing_ids
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hợp đồng không tồn tại: {sorted(missing_ids)}"
+        )
+
+    today = local_today()
+    rows = [
+        {
+            "contract_id": payment.contract_id,
+            "amount": payment.amount,
+            "paid_date": payment.paid_date or today,
+            "note": payment.note,
+            "collected_by": collected_by
+        }
+        for payment in payments
+    ]
+    db.execute(insert(Payment), rows)
+
+    balances = {}
+    for row in rows:
+        balance = balances.setdefault(row["contract_id"], {
+            "contract_id": row["contract_id"],
+            "total_paid": 0,
+            "payment_count": 0,
+            "last_paid_date": row["paid_date"]
+        })
+        balance["total_paid"] += row["amount"]
+        balance["payment_count"] += 1
+        balance["last_paid_date"] = max(balance["last_paid_date"], row["paid_date"])
+
+    # sorted so concurrent batches lock balance rows in the same order
+    stmt = upsert(ContractBalance).values([balances[contract_id] for contract_id in sorted(balances)])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContractBalance.contract_id],
+        set_={
+            "total_paid": ContractBalance.total_paid + stmt.excluded.total_paid,
+            "payment_count": ContractBalance.payment_count + stmt.excluded.payment_count,
+            "last_paid_date": func.greatest(ContractBalance.last_paid_date, stmt.excluded.last_paid_date),
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+
+    return rows
+
+
+@router.get("/contract/{contract_id}",
+            response_model=PaymentPageableResponse,
+            status_code=status.HTTP_200_OK)
+async def get_contract_payments(
+        contract_id: int,
+        page: int = 1,
+        page_size: int = 10,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        balance = db.query(ContractBalance.payment_count).filter(ContractBalance.contract_id == contract_id).scalar()
+        total = balance or 0
+        total_page = math.ceil(total / page_size)
+        payments = db.query(Payment).filter(Payment.contract_id == contract_id).order_by(Payment.id.desc()).limit(page_size).offset((page - 1) * page_size).all()
+        return PaymentPageableResponse(
+            payments=payments,
+            total_page=total_page,
+            total_data=total
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.get("/balance/{contract_id}",
+            response_model=ContractBalanceResponse,
+            status_code=status.HTTP_200_OK)
+async def get_contract_balance(
+        contract_id: int,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        row = db.query(Contract, ContractBalance).outerjoin(ContractBalance, ContractBalance.contract_id == Contract.id).filter(Contract.id == contract_id).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hợp đồng không tồn tại"
+            )
+
+        contract, balance = row
+        total_paid = balance.total_paid if balance else 0
+        total_due = compute_total_due(contract.loan, contract.duration, contract.daily_payment)
+        expected_paid = compute_expected_paid(contract.start_date, contract.duration, contract.period, contract.daily_payment)
+        outstanding = total_due - total_paid
+
+        return ContractBalanceResponse(
+            contract_id=contract.id,
+            contract_number=contract.contract_number,
+            total_due=total_due,
+            total_paid=total_paid,
+            payment_count=balance.payment_count if balance else 0,
+            last_paid_date=balance.last_paid_date if balance else None,
+            outstanding=outstanding,
+            arrears=max(expected_paid - total_paid, 0),
+            payoff_amount=max(outstanding, 0)
+        )
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.post("/create")
+async def create_payment(
+        newPayment: PaymentCreate,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        post_payments(db, [newPayment], current_user.id)
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_201_CREATED,
+            content={
+                "message": "Ghi nhận thanh toán thành công"
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.post("/create-many")
+async def create_many_payment(
+        batch: PaymentBatchCreate,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+    ):
+
+    try:
+        rows = post_payments(db, batch.payments, current_user.id)
+        db.commit()
+
+        return JSONResponse(
+            status_code=status.HTTP_201_CREATED,
+            content={
+                "message": "Ghi nhận thanh toán thành công",
+                "total_data": len(rows),
+                "total_amount": sum(row["amount"] for row in rows)
+            }
+        )
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime, date
+
+
+class PaymentCreate(BaseModel):
+    contract_id: int
+    amount: int
+    paid_date: Optional[date] = None
+    note: Optional[str] = None
+
+
+class PaymentBatchCreate(BaseModel):
+    payments: list[PaymentCreate]
+
+
+class PaymentResponse(BaseModel):
+    id: int
+    contract_id: int
+    amount: int
+    paid_date: date
+    note: Optional[str] = None
+    collected_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PaymentPageableResponse(BaseModel):
+    payments: list[PaymentResponse]
+
+    total_page: int
+    total_data: int
+
+    class Config:
+        from_attributes = True
+
+
+class ContractBalanceResponse(BaseModel):
+    contract_id: int
+    contract_number: str
+    total_due: int
+    total_paid: int
+    payment_count: int
+    last_paid_date: Optional[date] = None
+    outstanding: int
+    arrears: int
+    payoff_amount: int
+
+    class Config:
+        from_attributes = True
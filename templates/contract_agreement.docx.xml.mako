@@ -0,0 +1,27 @@
+<%def name="paragraph(text, bold=False, center=False, size=None)">\
+<w:p><w:pPr>${'<w:jc w:val="center"/>' if center else '' | n}</w:pPr><w:r><w:rPr>${'<w:b/>' if bold else '' | n}${('<w:sz w:val="%d"/>' % size) if size else '' | n}</w:rPr><w:t xml:space="preserve">${text}</w:t></w:r></w:p>\
+</%def>\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+<w:body>
+${paragraph("CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM", bold=True, center=True)}
+${paragraph("Độc lập - Tự do - Hạnh phúc", center=True)}
+${paragraph("HỢP ĐỒNG VAY TIỀN", bold=True, center=True, size=32)}
+${paragraph("Số: " + contract_number, center=True)}
+${paragraph("Hôm nay, ngày " + signed_date + ", chúng tôi gồm:")}
+${paragraph("BÊN CHO VAY (Bên A): " + lender_name, bold=True)}
+${paragraph("BÊN VAY (Bên B):", bold=True)}
+${paragraph("Họ và tên: " + customer["full_name"])}
+${paragraph("Số CCCD: " + (customer["cccd"] or ""))}
+${paragraph("Số điện thoại: " + (customer["phone_number"] or ""))}
+${paragraph("Địa chỉ: " + (customer["address"] or ""))}
+${paragraph("ĐIỀU KHOẢN KHOẢN VAY", bold=True)}
+% for label, value in terms:
+${paragraph(label + ": " + value)}
+% endfor
+${paragraph("Bên B cam kết thanh toán đầy đủ và đúng hạn theo lịch trả nợ nêu trên. Hợp đồng được lập thành hai bản, mỗi bên giữ một bản có giá trị pháp lý như nhau.")}
+${paragraph("BÊN CHO VAY                                                  BÊN VAY", bold=True, center=True)}
+${paragraph("(Ký, ghi rõ họ tên)                                          (Ký, ghi rõ họ tên)", center=True)}
+<w:sectPr><w:pgSz w:w="11906" w:h="16838"/><w:pgMar w:top="1134" w:right="1134" w:bottom="1134" w:left="1134" w:header="0" w:footer="0" w:gutter="0"/></w:sectPr>
+</w:body>
+</w:document>
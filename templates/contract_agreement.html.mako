@@ -0,0 +1,46 @@
+<!DOCTYPE html>
+<html lang="vi">
+<head>
+<meta charset="utf-8">
+<title>Hợp đồng ${contract_number}</title>
+<style>
+    @page { size: A4; margin: 20mm; }
+    body { font-family: "Times New Roman", serif; font-size: 13pt; line-height: 1.5; }
+    h1 { text-align: center; font-size: 16pt; margin-bottom: 0; }
+    .center { text-align: center; }
+    table.terms { width: 100%; border-collapse: collapse; }
+    table.terms td { padding: 2px 4px; vertical-align: top; }
+    table.signatures { width: 100%; margin-top: 40px; text-align: center; }
+</style>
+</head>
+<body>
+<p class="center"><b>CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM</b><br>Độc lập - Tự do - Hạnh phúc</p>
+<h1>HỢP ĐỒNG VAY TIỀN</h1>
+<p class="center">Số: ${contract_number}</p>
+<p>Hôm nay, ngày ${signed_date}, chúng tôi gồm:</p>
+
+<p><b>BÊN CHO VAY (Bên A):</b> ${lender_name}</p>
+
+<p><b>BÊN VAY (Bên B):</b></p>
+<table class="terms">
+    <tr><td>Họ và tên:</td><td>${customer["full_name"]}</td></tr>
+    <tr><td>Số CCCD:</td><td>${customer["cccd"] or ""}</td></tr>
+    <tr><td>Số điện thoại:</td><td>${customer["phone_number"] or ""}</td></tr>
+    <tr><td>Địa chỉ:</td><td>${customer["address"] or ""}</td></tr>
+</table>
+
+<p><b>ĐIỀU KHOẢN KHOẢN VAY</b></p>
+<table class="terms">
+    % for label, value in terms:
+    <tr><td>${label}:</td><td>${value}</td></tr>
+    % endfor
+</table>
+
+<p>Bên B cam kết thanh toán đầy đủ và đúng hạn theo lịch trả nợ nêu trên. Hợp đồng được lập thành hai bản, mỗi bên giữ một bản có giá trị pháp lý như nhau.</p>
+
+<table class="signatures">
+    <tr><td><b>BÊN CHO VAY</b><br><i>(Ký, ghi rõ họ tên)</i></td><td><b>BÊN VAY</b><br><i>(Ký, ghi rõ họ tên)</i></td></tr>
+    <tr><td style="padding-top: 80px"></td><td style="padding-top: 80px">${customer["full_name"]}</td></tr>
+</table>
+</body>
+</html>
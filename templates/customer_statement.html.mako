@@ -0,0 +1,50 @@
+<!DOCTYPE html>
+<html lang="vi">
+<head>
+<meta charset="utf-8">
+<title>Sao kê ${customer["full_name"]} tháng ${period}</title>
+<style>
+    @page { size: A4; margin: 15mm; }
+    body { font-family: "Times New Roman", serif; font-size: 12pt; line-height: 1.4; }
+    h1 { text-align: center; font-size: 15pt; margin-bottom: 0; }
+    .center { text-align: center; }
+    table.contracts { width: 100%; border-collapse: collapse; margin-top: 12px; }
+    table.contracts th, table.contracts td { border: 1px solid #444; padding: 3px 5px; }
+    table.contracts td.money { text-align: right; white-space: nowrap; }
+</style>
+</head>
+<body>
+<h1>SAO KÊ KHOẢN VAY</h1>
+<p class="center">Tháng ${period} - chốt số liệu ngày ${as_of}</p>
+
+<p>
+    Khách hàng: <b>${customer["full_name"]}</b> (mã ${customer["id"]})<br>
+    Số CCCD: ${customer["cccd"] or ""}<br>
+    Số điện thoại: ${customer["phone_number"] or ""}<br>
+    Địa chỉ: ${customer["address"] or ""}
+</p>
+
+% if contracts:
+<table class="contracts">
+    <tr>
+        <th>Số hợp đồng</th><th>Ngày bắt đầu</th><th>Số tiền vay</th><th>Phải trả</th>
+        <th>Đã trả</th><th>Còn lại</th><th>Trạng thái</th>
+    </tr>
+    % for contract in contracts:
+    <tr>
+        <td>${contract["contract_number"]}</td>
+        <td>${contract["start_date"]}</td>
+        <td class="money">${contract["loan"]}</td>
+        <td class="money">${contract["total_due"]}</td>
+        <td class="money">${contract["total_paid"]}</td>
+        <td class="money">${contract["remaining"]}</td>
+        <td>${contract["status"]}</td>
+    </tr>
+    % endfor
+</table>
+<p>Tổng dư nợ còn lại: <b>${total_remaining}</b></p>
+% else:
+<p>Khách hàng không có hợp đồng vay.</p>
+% endif
+</body>
+</html>
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, Index, Integer, String, func
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+from configs.database import Base, next_change_seq
+
+
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False, server_default=next_change_seq())
+
+    deleted_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tombstones_entity_change_seq", "entity", "change_seq"),
+    )
@@ -1,7 +1,7 @@
-from sqlalchemy import Boolean, Column, Integer, String, text, Date
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, func, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import TIMESTAMP
-from configs.database import Base
+from configs.database import Base, next_change_seq
 
 
 class User(Base):
@@ -16,6 +16,8 @@ class User(Base):
     address = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     role = Column(String, nullable=False, default="user")
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=False, index=True, server_default=next_change_seq(), onupdate=next_change_seq())
 
     auth_credential = relationship("AuthCredential", back_populates="user", uselist=False, passive_deletes=True)
\ No newline at end of file
@@ -1,5 +1,6 @@
-from fastapi import status, APIRouter, Depends, HTTPException, status
+from fastapi import status, APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from configs.database import get_db
@@ -7,6 +8,11 @@ from configs.authentication import get_current_user, hash_password, validate_pwd
 from user.models.user import User
 from user.schemas.user import *
 from auth_credential.models.auth_credential import AuthCredential
+from utils.audit_log import record_audit, snapshot
+from utils.change_feed import record_tombstones
+from utils.content_negotiation import negotiate_media_type, tabular_response
+from utils.hot_queries import user_by_id, user_by_username
+from utils.etag import etag_headers, make_etag, not_modified, table_version
 from os import getenv
 import math
 
@@ -15,17 +21,39 @@ router = APIRouter(
     prefix= "/user",
     tags=["User"]
 )
+
+
+EXPORT_COLUMNS = [
+    User.id,
+    User.username,
+    User.full_name,
+    User.email,
+    User.phone_number,
+    User.birthdate,
+    User.address,
+    User.role,
+    User.is_active,
+    User.created_at,
+    User.updated_at,
+    User.change_seq
+]
     
 
 @router.get("/all",
             response_model=ListUserResponse,
             status_code=status.HTTP_200_OK)
 async def get_all_users(
+        request: Request,
         db: Session = Depends(get_db), 
         current_user = Depends(get_current_user)
     ):
     
     try:
+        media_type = negotiate_media_type(request)
+        if media_type:
+            result = db.execute(select(*EXPORT_COLUMNS).order_by(User.id))
+            return tabular_response(media_type, EXPORT_COLUMNS, result)
+
         users = db.query(User).all()
 
         return ListUserResponse(
@@ -44,6 +72,8 @@ async def get_all_users(
             response_model=UserPageableResponse, 
             status_code=status.HTTP_200_OK)
 async def get_user_pageable(
+        request: Request,
+        response: Response,
         page: int, 
         page_size: int, 
         db: Session = Depends(get_db), 
@@ -51,10 +81,26 @@ async def get_user_pageable(
     ):
      
     try:
-        total_count = db.query(User).count()
+        version = table_version(db, User, "user")
+        total_count = version[0]
         total_pages = math.ceil(total_count / page_size)
         offset = (page - 1) * page_size
+
+        media_type = negotiate_media_type(request)
+        etag = make_etag("user", version, page, page_size, media_type)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        if media_type:
+            result = db.execute(select(*EXPORT_COLUMNS).order_by(User.id).offset(offset).limit(page_size))
+            return tabular_response(media_type, EXPORT_COLUMNS, result, {
+                "X-Total-Data": str(total_count),
+                "X-Total-Page": str(total_pages),
+                **etag_headers(etag)
+            })
         
+        response.headers.update(etag_headers(etag))
         users = db.query(User).offset(offset).limit(page_size).all()
 
         user_pageable_res = UserPageableResponse(
@@ -77,18 +123,26 @@ async def get_user_pageable(
             response_model=UserResponse)
 async def get_user_by_id(
         user_id: int, 
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         current_user = Depends(get_current_user)
     ):
     
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.execute(user_by_id(user_id)).scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Người dùng không tồn tại"
             )
 
+        etag = make_etag("user", user.id, user.change_seq)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        response.headers.update(etag_headers(etag))
         return user
     
     except SQLAlchemyError as e:
@@ -105,7 +159,7 @@ async def create_account(
     ):
     
     try:
-        username = db.query(User).filter(User.username == account.username).first()
+        username = db.execute(user_by_username(account.username)).scalars().first()
         if username:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -134,6 +188,9 @@ async def create_account(
             hashed_password=hash_password(account.password)
         )
         db.add(new_auth)
+        db.flush()
+        record_audit(db, "user", "create", new_info.id, after=snapshot(new_info))
+        record_audit(db, "auth_credential", "create", new_auth.id, after=snapshot(new_auth))
         db.commit()
 
         return JSONResponse(
@@ -161,7 +218,8 @@ async def update_user(
  
     try:
         user = db.query(User).filter(User.id == user_id)
-        if not user.first():
+        existing_user = user.first()
+        if not existing_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Người dùng không tồn tại"
@@ -171,6 +229,7 @@ async def update_user(
             newUser.dict(), 
             synchronize_session=False
         )
+        record_audit(db, "user", "update", user_id, snapshot(existing_user), snapshot(existing_user, **newUser.dict()))
         db.commit()
 
         return JSONResponse(
@@ -198,13 +257,16 @@ async def delete_user(
     
     try:
         user = db.query(User).filter(User.id == user_id)
-        if not user.first():
+        existing_user = user.first()
+        if not existing_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Người dùng không tồn tại"
             )
 
+        record_tombstones(db, "user", User.id, User.id == user_id)
         user.delete(synchronize_session=False)
+        record_audit(db, "user", "delete", user_id, before=snapshot(existing_user))
         db.commit()
 
         return JSONResponse(
@@ -231,13 +293,17 @@ async def delete_many_user(
     
     try:
         users = db.query(User).filter(User.id.in_(ids.list_id))
-        if not users.first():
+        deleted_users = users.all()
+        if not deleted_users:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Người dùng không tồn tại"
             )
 
+        record_tombstones(db, "user", User.id, User.id.in_(ids.list_id))
         users.delete(synchronize_session=False)
+        for deleted_user in deleted_users:
+            record_audit(db, "user", "delete", deleted_user.id, before=snapshot(deleted_user))
         db.commit()
 
         return JSONResponse(
@@ -262,7 +328,9 @@ async def delete_all_user(
     ):
     
     try:
-        db.query(User).delete()
+        record_tombstones(db, "user", User.id)
+        deleted = db.query(User).delete()
+        record_audit(db, "user", "delete_all", after={"deleted": deleted})
         db.commit()
 
         return JSONResponse(
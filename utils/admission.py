@@ -0,0 +1,105 @@
+import asyncio
+import time
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from configs.conf import settings
+from utils.content_negotiation import ARROW_MEDIA_TYPE, MSGPACK_MEDIA_TYPES
+
+
+EXEMPT_PREFIXES = ("/admin", "/event/stream", "/uploads", "/docs", "/redoc", "/openapi.json")
+AUTH_PATHS = ("/login", "/auth-credential/reset-password", "/auth-credential/update-password")
+EXPORT_MEDIA_TYPES = (ARROW_MEDIA_TYPE, *MSGPACK_MEDIA_TYPES)
+
+
+class AdmissionGate:
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self, timeout: float):
+        if self.in_flight + self.waiting >= self.limit + self.queue_size:
+            self.rejected += 1
+            return False
+
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.wait_seconds += time.monotonic() - started
+        self.admitted += 1
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_seconds / self.admitted * 1000, 2) if self.admitted else 0
+        }
+
+
+gates = {name: AdmissionGate(limit, queue_size) for name, (limit, queue_size) in settings.admission_limits.items()}
+
+
+def route_class(scope):
+    path = scope["path"]
+    if path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith(AUTH_PATHS):
+        return "auth"
+    if scope["method"] not in ("GET", "HEAD", "OPTIONS"):
+        return "write"
+
+    accept = Headers(scope=scope).get("accept", "")
+    if path.endswith("/all") or any(media_type in accept for media_type in EXPORT_MEDIA_TYPES):
+        return "export"
+
+    return "list"
+
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        gate = gates.get(route_class(scope)) if scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await gate.acquire(settings.admission_wait_seconds):
+            # shed load early instead of letting requests pile up on the connection pool
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Hệ thống đang quá tải, vui lòng thử lại sau"},
+                headers={"Retry-After": str(settings.admission_retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
@@ -0,0 +1,256 @@
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from jose import JWTError, jwt
+from sqlalchemy import event, insert, inspect, text
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from audit.models.audit import AuditLog
+from configs.conf import settings
+from configs.database import SessionLocal, engine
+from utils.contract_schedule import TIMEZONE, local_today
+from utils.slow_queries import current_route, request_scope
+
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_COLUMNS = {"full_name_search", "address_search"}
+REDACTED_COLUMNS = {"hashed_password"}
+
+
+def snapshot(row, **changes):
+    # only attributes already loaded are read, so taking a snapshot never costs a query
+    loaded = inspect(row).dict
+    values = {
+        column.key: loaded[column.key]
+        for column in row.__table__.columns if column.key in loaded and column.key not in EXCLUDED_COLUMNS
+    }
+    values.update(changes)
+    return jsonable_encoder({key: "***" if key in REDACTED_COLUMNS else value for key, value in values.items()})
+
+
+def request_actor():
+    scope = request_scope.get()
+    if scope is None:
+        return None
+
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=settings.algorithm)
+    except JWTError:
+        return None
+
+    return payload.get("user_id")
+
+
+def request_client():
+    scope = request_scope.get()
+    if scope is None or not scope.get("client"):
+        return None
+
+    return scope["client"][0]
+
+
+def record_audit(db: Session, entity: str, action: str, entity_id: int = None, before: dict = None, after: dict = None):
+    # like publish_change, entries wait on the session and only reach the buffer once the caller commits
+    db.info.setdefault("pending_audit", []).append({
+        "actor_id": request_actor(),
+        "client_address": request_client(),
+        "route": current_route(),
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "before": before,
+        "after": after
+    })
+
+
+def partition_name(month_start):
+    return f"audit_logs_m{month_start:%Y%m}"
+
+
+def month_bounds(month_start):
+    next_month = month_start.replace(year=month_start.year + month_start.month // 12, month=month_start.month % 12 + 1)
+    return TIMEZONE.localize(datetime(month_start.year, month_start.month, 1)), TIMEZONE.localize(datetime(next_month.year, next_month.month, 1))
+
+
+def ensure_audit_partitions(connection, months_ahead: int = 1):
+    if connection.dialect.name != "postgresql":
+        return []
+
+    is_partitioned = connection.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('audit_logs')"
+    )).scalar()
+    if not is_partitioned:
+        return []
+
+    month_start = local_today().replace(day=1)
+    created = []
+    for _ in range(months_ahead + 1):
+        name = partition_name(month_start)
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            start, end = month_bounds(month_start)
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF audit_logs "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+        month_start = month_bounds(month_start)[1].date()
+
+    return created
+
+
+class AuditBuffer:
+    def __init__(self, max_size: int, batch_size: int, flush_seconds: float, write_attempts: int):
+        self.entries = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.write_attempts = write_attempts
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.spill_pool = None
+        self.partition_month = None
+        self.enqueued = 0
+        self.written = 0
+        self.spilled = 0
+        self.failed = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                if not self.stopping.is_set():
+                    return
+                self.thread.join()
+            if self.thread is None:
+                atexit.register(self.stop)
+            self.stopping.clear()
+            self.spill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-spill")
+            self.thread = threading.Thread(target=self.run, name="audit-flusher", daemon=True)
+            self.thread.start()
+
+    def put(self, entries: list):
+        self.start()
+        enqueued, overflow = 0, []
+        for entry in entries:
+            try:
+                self.entries.put_nowait(entry)
+                enqueued += 1
+            except queue.Full:
+                overflow.append(entry)
+
+        with self.lock:
+            self.enqueued += enqueued
+            self.spilled += len(overflow)
+
+        if overflow:
+            # a full buffer never loses entries: threadpool requests write them themselves and so slow down,
+            # commits on the event loop hand them to a spill thread instead of blocking every other request
+            logger.warning("Audit buffer full, writing %s entries directly", len(overflow))
+            if self.on_event_loop():
+                self.spill_pool.submit(self.write, overflow)
+            else:
+                self.write(overflow)
+
+    @staticmethod
+    def on_event_loop():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def take_batch(self):
+        try:
+            batch = [self.entries.get(timeout=self.flush_seconds)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            timeout = 0 if self.stopping.is_set() else max(deadline - time.monotonic(), 0)
+            try:
+                batch.append(self.entries.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def write(self, batch: list):
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                with engine.begin() as connection:
+                    if self.partition_month != local_today().replace(day=1):
+                        ensure_audit_partitions(connection)
+                        self.partition_month = local_today().replace(day=1)
+                    connection.execute(insert(AuditLog), batch)
+                with self.lock:
+                    self.written += len(batch)
+                return
+            except Exception:
+                logger.exception("Could not write %s audit entries (attempt %s)", len(batch), attempt)
+                if attempt < self.write_attempts:
+                    time.sleep(min(2 ** attempt, 30))
+
+        # the entries are still recorded in the application log
+        with self.lock:
+            self.failed += len(batch)
+        logger.error("Gave up writing audit entries: %s", batch)
+
+    def run(self):
+        while True:
+            batch = self.take_batch()
+            if batch:
+                self.write(batch)
+            elif self.stopping.is_set():
+                return
+
+    def stop(self):
+        # the flusher drains everything already queued before it exits
+        self.stopping.set()
+        thread = self.thread
+        if thread is not None:
+            thread.join()
+        if self.spill_pool is not None:
+            self.spill_pool.shutdown(wait=True)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "running": self.thread is not None and self.thread.is_alive(),
+                "queued": self.entries.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "spilled": self.spilled,
+                "failed": self.failed
+            }
+
+
+audit_buffer = AuditBuffer(
+    settings.audit_buffer_size,
+    settings.audit_batch_size,
+    settings.audit_flush_seconds,
+    settings.audit_write_attempts
+)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def enqueue_pending_audit(session):
+    entries = session.info.pop("pending_audit", None)
+    if entries:
+        committed_at = datetime.now(timezone.utc)
+        audit_buffer.put([{**entry, "created_at": committed_at} for entry in entries])
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def discard_pending_audit(session, previous_transaction):
+    session.info.pop("pending_audit", None)
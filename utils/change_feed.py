@@ -0,0 +1,63 @@
+from sqlalchemy import insert, literal, select, text
+from sqlalchemy.orm import Session
+from tombstone.models.tombstone import Tombstone
+
+
+def record_tombstones(db: Session, entity: str, id_column, *criteria, returning: bool = False):
+    stmt = insert(Tombstone).from_select(
+        ["entity", "entity_id"],
+        select(literal(entity), id_column).where(*criteria)
+    )
+    if not returning:
+        db.execute(stmt)
+        return None
+
+    return db.execute(stmt.returning(Tombstone.entity_id)).scalars().all()
+
+
+def change_horizon(db: Session):
+    # every change_seq below this is committed or rolled back: a running writer registered its floor (see
+    # next_change_seq) before taking a value, and one that registers after pg_locks is read can only take values
+    # past the sequence position read first. The single bigint advisory key space is reserved for these floors
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+
+    next_value = db.execute(text(
+        "SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END FROM change_seq"
+    )).scalar()
+    floor = db.execute(text(
+        "SELECT min((classid::bigint << 32) | objid::bigint) FROM pg_locks "
+        "WHERE locktype = 'advisory' AND objsubid = 1 "
+        "AND database = (SELECT oid FROM pg_database WHERE datname = current_database())"
+    )).scalar()
+
+    return min(next_value, floor) if floor is not None else next_value
+
+
+def fetch_changes(db: Session, model, entity: str, since: int, limit: int, *options):
+    horizon = change_horizon(db)
+    row_filters = [model.change_seq > since]
+    tombstone_filters = [Tombstone.entity == entity, Tombstone.change_seq > since]
+    if horizon is not None:
+        row_filters.append(model.change_seq < horizon)
+        tombstone_filters.append(Tombstone.change_seq < horizon)
+
+    rows = db.query(model).options(*options).filter(*row_filters).order_by(model.change_seq).limit(limit + 1).all()
+    tombstones = db.query(Tombstone.entity_id, Tombstone.change_seq).filter(
+        *tombstone_filters
+    ).order_by(Tombstone.change_seq).limit(limit + 1).all()
+
+    changes = sorted(
+        [(row.change_seq, row, None) for row in rows] +
+        [(tombstone.change_seq, None, tombstone.entity_id) for tombstone in tombstones],
+        key=lambda change: change[0]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    return {
+        "updated": [row for _, row, _ in changes if row is not None],
+        "deleted_ids": [entity_id for _, _, entity_id in changes if entity_id is not None],
+        "next_since": changes[-1][0] if changes else since,
+        "has_more": has_more
+    }
@@ -0,0 +1,87 @@
+from datetime import date, datetime
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import BigInteger, Boolean, Date, Float, Integer
+from sqlalchemy.sql.sqltypes import TIMESTAMP
+import msgpack
+import pyarrow as pa
+
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+BATCH_SIZE = 65536
+
+
+def negotiate_media_type(request: Request):
+    accept = request.headers.get("accept", "")
+    if ARROW_MEDIA_TYPE in accept:
+        return ARROW_MEDIA_TYPE
+
+    for media_type in MSGPACK_MEDIA_TYPES:
+        if media_type in accept:
+            return media_type
+
+    return None
+
+
+def arrow_type(column):
+    column_type = column.type
+    if isinstance(column_type, TIMESTAMP):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, (BigInteger, Integer)):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    return pa.string()
+
+
+def arrow_schema(columns):
+    return pa.schema([(column.key, arrow_type(column)) for column in columns])
+
+
+def arrow_batches(schema, result):
+    for rows in result.partitions(BATCH_SIZE):
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+            schema=schema
+        )
+
+
+def to_arrow_ipc(columns, result):
+    schema = arrow_schema(columns)
+    sink = pa.BufferOutputStream()
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in arrow_batches(schema, result):
+            writer.write_batch(batch)
+
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def to_msgpack(columns, result):
+    return msgpack.packb(
+        {
+            "columns": [column.key for column in columns],
+            "rows": [tuple(row) for row in result]
+        },
+        default=encode_msgpack_value
+    )
+
+
+def tabular_response(media_type: str, columns, result, headers: dict = None):
+    if media_type == ARROW_MEDIA_TYPE:
+        content = to_arrow_ipc(columns, result)
+    else:
+        content = to_msgpack(columns, result)
+
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,77 @@
+import os
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from configs.conf import settings
+from contract.models.contract import Contract
+from utils.content_negotiation import arrow_batches, arrow_schema
+from utils.contract_partition import CONTRACT_NUMBER_PATTERN, partition_name, year_bounds
+
+
+ARCHIVE_COLUMNS = list(Contract.__table__.columns)
+
+
+def archive_dir():
+    return os.path.join(settings.archive_dir, "contracts")
+
+
+def archive_path(year: int):
+    return os.path.join(archive_dir(), f"{partition_name(year)}.parquet")
+
+
+def list_archive_paths():
+    if not os.path.isdir(archive_dir()):
+        return []
+
+    return sorted(os.path.join(archive_dir(), name) for name in os.listdir(archive_dir()) if name.endswith(".parquet"))
+
+
+def write_contract_archive(connection, year: int):
+    start, end = year_bounds(year)
+    result = connection.execute(
+        select(*ARCHIVE_COLUMNS).where(
+            Contract.created_at >= start,
+            Contract.created_at < end
+        ).order_by(Contract.id),
+        execution_options={"stream_results": True}
+    )
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    path = archive_path(year)
+    schema = arrow_schema(ARCHIVE_COLUMNS)
+    total_rows = 0
+
+    with pq.ParquetWriter(f"{path}.tmp", schema, compression="zstd") as writer:
+        for batch in arrow_batches(schema, result):
+            writer.write_batch(batch)
+            total_rows += batch.num_rows
+
+    if pq.ParquetFile(f"{path}.tmp").metadata.num_rows != total_rows:
+        os.remove(f"{path}.tmp")
+        raise RuntimeError(f"Archive of {partition_name(year)} is incomplete")
+
+    os.replace(f"{path}.tmp", path)
+    return total_rows
+
+
+def find_archived_contracts(contract_number: str = None, customer_id: int = None):
+    paths = list_archive_paths()
+    conditions = []
+
+    if contract_number:
+        match = CONTRACT_NUMBER_PATTERN.match(contract_number.strip())
+        if match:
+            paths = [path for path in paths if os.path.basename(path) == f"{partition_name(int(match.group(1)[:4]))}.parquet"]
+        conditions.append(ds.field("contract_number") == contract_number.strip().upper())
+
+    if customer_id is not None:
+        conditions.append(ds.field("customer_id") == customer_id)
+
+    if not paths:
+        return []
+
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+
+    return ds.dataset(paths, format="parquet").to_table(filter=condition).to_pylist()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import re
+from sqlalchemy import text
+from contract.models.contract import Contract
+from utils.contract_schedule import TIMEZONE, local_today
+
+
+CONTRACT_NUMBER_PATTERN = re.compile(r"^HD-(\d{8})-\d+$", re.IGNORECASE)
+
+
+def partition_name(year: int):
+    return f"contracts_y{year}"
+
+
+def year_bounds(year: int):
+    return TIMEZONE.localize(datetime(year, 1, 1)), TIMEZONE.localize(datetime(year + 1, 1, 1))
+
+
+def contract_created_range(contract_number: str):
+    match = CONTRACT_NUMBER_PATTERN.match(contract_number.strip())
+    if not match:
+        return None
+
+    try:
+        day = datetime.strptime(match.group(1), "%Y%m%d")
+    except ValueError:
+        return None
+
+    # the number is generated just before the insert, so allow a day of slack either side
+    start = TIMEZONE.localize(day - timedelta(days=1))
+    return start, start + timedelta(days=3)
+
+
+def contract_number_filter(contract_number: str):
+    # numbers are generated upper-case, so equality keeps the lookup on the unique index
+    criteria = [Contract.contract_number == contract_number.strip().upper()]
+    created_range = contract_created_range(contract_number)
+    if created_range:
+        criteria += [Contract.created_at >= created_range[0], Contract.created_at < created_range[1]]
+
+    return criteria
+
+
+def is_partitioned(connection):
+    if connection.dialect.name != "postgresql":
+        return False
+
+    return connection.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('contracts')"
+    )).scalar() or False
+
+
+def list_contract_partitions(connection):
+    if not is_partitioned(connection):
+        return []
+
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'contracts'::regclass"
+    )).scalars()
+    return sorted(int(name.removeprefix("contracts_y")) for name in names if name.startswith("contracts_y"))
+
+
+def create_contract_partition(connection, year: int):
+    start, end = year_bounds(year)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(year)} PARTITION OF contracts "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def ensure_contract_partitions(connection, years_ahead: int = 1):
+    if not is_partitioned(connection):
+        return []
+
+    existing = set(list_contract_partitions(connection))
+    this_year = local_today().year
+    created = [year for year in range(this_year, this_year + years_ahead + 1) if year not in existing]
+    for year in created:
+        create_contract_partition(connection, year)
+
+    return created
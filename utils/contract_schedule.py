@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+import pytz
+
+
+TIMEZONE = pytz.timezone("Asia/Ho_Chi_Minh")
+
+
+def local_today():
+    return datetime.now(TIMEZONE).date()
+
+
+def compute_next_due(start_date, duration, period, daily_payment, on_date=None):
+    if not start_date or not duration:
+        return None, None
+
+    on_date = on_date or local_today()
+    period = period or 1
+    end_date = start_date + timedelta(days=duration)
+    if on_date > end_date:
+        return None, None
+
+    elapsed = max((on_date - start_date).days, 0)
+    installment = max(-(-elapsed // period), 1)
+    next_due_date = min(start_date + timedelta(days=installment * period), end_date)
+    previous_due_date = start_date + timedelta(days=(installment - 1) * period)
+
+    if daily_payment is None:
+        return next_due_date, None
+
+    return next_due_date, daily_payment * (next_due_date - previous_due_date).days
+
+
+def compute_total_due(loan, duration, daily_payment):
+    if daily_payment and duration:
+        return daily_payment * duration
+
+    return loan or 0
+
+
+def compute_expected_paid(start_date, duration, period, daily_payment, on_date=None):
+    if not start_date or not duration or not daily_payment:
+        return 0
+
+    on_date = on_date or local_today()
+    period = period or 1
+    elapsed = max((on_date - start_date).days, 0)
+    if elapsed >= duration:
+        return daily_payment * duration
+
+    return daily_payment * (elapsed // period) * period
@@ -0,0 +1,67 @@
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+from configs.database import SessionLocal, upsert
+from contract.models.contract import Contract
+from customer.models.customer import Customer
+from dashboard.models.dashboard import DailyContractStat, DailyCustomerStat
+from utils.contract_schedule import TIMEZONE
+
+
+def local_day(column):
+    return func.date(func.timezone(TIMEZONE.zone, column))
+
+
+def apply_customer_stats(db: Session, sign: int, *criteria):
+    day = local_day(Customer.created_at)
+    # SQLite needs a WHERE clause before ON CONFLICT in INSERT ... SELECT
+    rows = select(
+        day,
+        sign * func.count(),
+        sign * func.count().filter(Customer.is_new.is_(True))
+    ).where(true(), *criteria).group_by(day)
+
+    stmt = upsert(DailyCustomerStat).from_select(["day", "new_customers", "new_is_new"], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyCustomerStat.day],
+        set_={
+            "new_customers": DailyCustomerStat.new_customers + stmt.excluded.new_customers,
+            "new_is_new": DailyCustomerStat.new_is_new + stmt.excluded.new_is_new
+        }
+    )
+    db.execute(stmt)
+
+
+def apply_contract_stats(db: Session, sign: int, *criteria):
+    day = local_day(Contract.created_at)
+    rows = select(
+        day,
+        sign * func.count(),
+        sign * func.coalesce(func.sum(Contract.loan), 0)
+    ).where(true(), *criteria).group_by(day)
+
+    stmt = upsert(DailyContractStat).from_select(["day", "contracts_opened", "loan_volume"], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyContractStat.day],
+        set_={
+            "contracts_opened": DailyContractStat.contracts_opened + stmt.excluded.contracts_opened,
+            "loan_volume": DailyContractStat.loan_volume + stmt.excluded.loan_volume
+        }
+    )
+    db.execute(stmt)
+
+
+def rebuild_dashboard_stats(db: Session):
+    db.query(DailyCustomerStat).delete()
+    db.query(DailyContractStat).delete()
+    apply_customer_stats(db, 1)
+    apply_contract_stats(db, 1)
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        rebuild_dashboard_stats(db)
+        db.commit()
+        print("Rebuilt dashboard summaries")
+    finally:
+        db.close()
@@ -0,0 +1,43 @@
+import hashlib
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from tombstone.models.tombstone import Tombstone
+
+
+def table_version(db: Session, model, entity: str, *related):
+    # count catches bulk deletes and dropped partitions, the change_seq aggregates catch inserts and updates.
+    # On PostgreSQL a smaller change_seq can commit after a larger one and leave max() as it was, while
+    # sum() still moves because an update always gives its row a larger value; SQLite commits in order
+    aggregate = func.max if db.get_bind().dialect.name == "sqlite" else func.sum
+    deleted_seq = select(aggregate(Tombstone.change_seq)).where(Tombstone.entity == entity).scalar_subquery()
+    related_seqs = [select(aggregate(related_model.change_seq)).scalar_subquery() for related_model in related]
+
+    return tuple(db.execute(
+        select(func.count(), aggregate(model.change_seq), deleted_seq, *related_seqs).select_from(model)
+    ).one())
+
+
+def make_etag(*parts):
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_headers(etag: str):
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept, Authorization"
+    }
+
+
+def not_modified(request: Request, etag: str):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" not in tags and etag.removeprefix("W/") not in tags:
+        return None
+
+    return Response(status_code=304, headers=etag_headers(etag))
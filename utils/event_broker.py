@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import psycopg2
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from configs.conf import settings
+from configs.database import IS_SQLITE, SessionLocal, engine
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "app_events"
+MAX_NOTIFY_IDS = 500
+
+
+def publish_change(db: Session, entity: str, action: str, ids: list = None):
+    # NOTIFY is transactional: listeners only see the event once the caller commits
+    if ids is not None and len(ids) > MAX_NOTIFY_IDS:
+        ids = None
+    payload = json.dumps({"entity": entity, "action": action, "ids": ids})
+    if IS_SQLITE:
+        db.info.setdefault("pending_events", []).append(payload)
+        return
+    db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+class EventBroker:
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self.subscribers = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topics: set):
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        self.subscribers[queue] = topics
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.pop(queue, None)
+
+    def publish(self, payload: str):
+        topic = json.loads(payload).get("entity")
+        frame = f"event: {topic}\ndata: {payload}\n\n"
+        self.published += 1
+
+        for queue, topics in list(self.subscribers.items()):
+            if topics and topic not in topics:
+                continue
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.drop(queue)
+
+    def drop(self, queue: asyncio.Queue):
+        # slow consumer: free its buffer and close the stream, the client resyncs from /changes
+        self.unsubscribe(queue)
+        self.dropped += 1
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def close(self):
+        for queue in list(self.subscribers):
+            self.drop(queue)
+
+
+class PgListener:
+    def __init__(self, broker: EventBroker, reconnect_seconds: int = 5):
+        self.broker = broker
+        self.reconnect_seconds = reconnect_seconds
+        self.connection = None
+        self.fd = None
+        self.reconnect_task = None
+        self.loop = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.loop = loop
+        if IS_SQLITE:
+            return
+
+        raw_connection = engine.raw_connection()
+        raw_connection.detach()
+
+        self.connection = raw_connection.dbapi_connection
+        self.connection.autocommit = True
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        # a dead connection no longer reports its fileno(), so the fd is kept to unregister the reader later
+        self.fd = self.connection.fileno()
+        loop.add_reader(self.fd, self.on_notify)
+
+    def on_notify(self):
+        try:
+            self.connection.poll()
+        except Exception:
+            logger.exception("Lost LISTEN connection, reconnecting")
+            self.close_connection()
+            self.reconnect_task = asyncio.get_running_loop().create_task(self.reconnect())
+            return
+
+        while self.connection.notifies:
+            notify = self.connection.notifies.pop(0)
+            self.broker.publish(notify.payload)
+
+    def deliver(self, payload: str):
+        # SQLite has no NOTIFY, committed sessions hand their events over from whatever thread they run on
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.broker.publish, payload)
+
+    async def reconnect(self):
+        while True:
+            await asyncio.sleep(self.reconnect_seconds)
+            try:
+                await self.start()
+                return
+            except Exception:
+                logger.exception("Could not re-establish LISTEN connection")
+
+    def close_connection(self):
+        if self.fd is not None:
+            self.loop.remove_reader(self.fd)
+            self.fd = None
+        if self.connection is None:
+            return
+        try:
+            self.connection.close()
+        except psycopg2.Error:
+            pass
+        self.connection = None
+
+    def stop(self):
+        if self.reconnect_task:
+            self.reconnect_task.cancel()
+        self.close_connection()
+        self.broker.close()
+
+
+broker = EventBroker(settings.event_buffer_size)
+pg_listener = PgListener(broker)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def deliver_pending_events(session):
+    for payload in session.info.pop("pending_events", []):
+        pg_listener.deliver(payload)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def discard_pending_events(session, previous_transaction):
+    session.info.pop("pending_events", None)
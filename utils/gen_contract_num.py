@@ -1,7 +1,12 @@
 from datetime import datetime
 import pytz
-from sqlalchemy import func
+from sqlalchemy import func, text
 from contract.models.contract import Contract
+from utils.contract_partition import contract_number_filter
+
+
+CONTRACT_NUMBER_LOCK = 1
+
 
 def generate_contract_code(session):
     from datetime import datetime
@@ -10,10 +15,16 @@ def generate_contract_code(session):
     timezone = pytz.timezone("Asia/Ho_Chi_Minh")
     today_str = datetime.now(timezone).strftime('%Y%m%d')
 
+    # contract_number is only unique together with created_at on the partitioned table, so creators of the
+    # same day take turns until commit; SQLite keeps a plain UNIQUE and the caller retries on a conflict
+    if session.get_bind().dialect.name == "postgresql":
+        # the two-key form, single bigint keys belong to the change feed floors
+        session.execute(text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:day))"), {"namespace": CONTRACT_NUMBER_LOCK, "day": today_str})
+
     index = 1
     while True:
         code = f"HD-{today_str}-{index:04d}"
-        exists = session.query(Contract).filter(Contract.contract_number == code).first()
+        exists = session.query(Contract).filter(*contract_number_filter(code)).first()
         if not exists:
             return code
         index += 1
@@ -0,0 +1,32 @@
+from sqlalchemy import lambda_stmt, select
+from contract.models.contract import Contract
+from customer.models.customer import Customer
+from user.models.user import User
+from utils.contract_partition import contract_created_range
+
+
+# lambda statements are built and compiled once per call site, then only the bound values change
+def user_by_id(user_id: int):
+    return lambda_stmt(lambda: select(User).where(User.id == user_id))
+
+
+def user_by_username(username: str):
+    return lambda_stmt(lambda: select(User).where(User.username == username))
+
+
+def customer_by_id(customer_id: int):
+    return lambda_stmt(lambda: select(Customer).where(Customer.id == customer_id))
+
+
+def contract_by_number(contract_number: str):
+    contract_number = contract_number.strip().upper()
+    created_range = contract_created_range(contract_number)
+    if not created_range:
+        return lambda_stmt(lambda: select(Contract).where(Contract.contract_number == contract_number).limit(1))
+
+    created_from, created_to = created_range
+    return lambda_stmt(lambda: select(Contract).where(
+        Contract.contract_number == contract_number,
+        Contract.created_at >= created_from,
+        Contract.created_at < created_to
+    ).limit(1))
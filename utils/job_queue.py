@@ -0,0 +1,267 @@
+import asyncio
+import inspect
+import logging
+import os
+import socket
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from configs.conf import settings
+from configs.database import SessionLocal, seconds_from_now
+from job.models.job import Job
+from utils.event_broker import broker, publish_change
+
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def task(name: str, queue: str = "default", max_attempts: int = 3):
+    def register(handler):
+        # the first parameter is the JobContext, the rest are what a payload may set
+        parameters = list(inspect.signature(handler).parameters)[1:]
+        TASKS[name] = {"handler": handler, "queue": queue, "max_attempts": max_attempts, "parameters": parameters}
+        return handler
+
+    return register
+
+
+def enqueue(db: Session, name: str, payload: dict = None, created_by: int = None):
+    # the job row commits with the caller's transaction, so work is never queued for a rolled-back request
+    definition = TASKS[name]
+    job = Job(
+        queue=definition["queue"],
+        name=name,
+        payload=payload or {},
+        max_attempts=definition["max_attempts"],
+        created_by=created_by
+    )
+    db.add(job)
+    db.flush()
+    publish_change(db, "job", "queued", [job.id])
+    return job
+
+
+def claim_job(queue: str, worker_id: str):
+    db = SessionLocal()
+    try:
+        next_job = select(Job.id).where(
+            Job.queue == queue,
+            Job.status == "queued",
+            Job.run_at <= func.now()
+        ).order_by(Job.run_at, Job.id).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+
+        claimed = db.execute(
+            update(Job).where(Job.id == next_job).values(
+                status="running",
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                locked_at=func.now(),
+                started_at=func.coalesce(Job.started_at, func.now())
+            ).returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+        ).first()
+        if claimed:
+            publish_change(db, "job", "running", [claimed.id])
+        db.commit()
+        return claimed
+
+    finally:
+        db.close()
+
+
+def finish_job(job_id: int, values: dict, action: str):
+    db = SessionLocal()
+    try:
+        updated = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == "running").values(
+                locked_by=None,
+                locked_at=None,
+                **values
+            )
+        ).rowcount
+        if updated:
+            publish_change(db, "job", action, [job_id])
+        db.commit()
+
+    finally:
+        db.close()
+
+
+def renew_lease(job_id: int):
+    db = SessionLocal()
+    try:
+        db.execute(update(Job).where(Job.id == job_id, Job.status == "running").values(locked_at=func.now()))
+        db.commit()
+
+    finally:
+        db.close()
+
+
+def requeue_stale_jobs(lease_seconds: int):
+    # a worker that died mid-job stops renewing its lease, so the job goes back to the queue or fails
+    db = SessionLocal()
+    try:
+        stale = Job.locked_at < seconds_from_now(-lease_seconds)
+        exhausted = db.execute(
+            update(Job).where(Job.status == "running", stale, Job.attempts >= Job.max_attempts).values(
+                status="failed",
+                error="Worker stopped responding",
+                locked_by=None,
+                locked_at=None,
+                finished_at=func.now()
+            ).returning(Job.id)
+        ).scalars().all()
+        requeued = db.execute(
+            update(Job).where(Job.status == "running", stale).values(
+                status="queued",
+                locked_by=None,
+                locked_at=None,
+                run_at=func.now()
+            ).returning(Job.id)
+        ).scalars().all()
+        if exhausted:
+            publish_change(db, "job", "failed", exhausted)
+        if requeued:
+            publish_change(db, "job", "queued", requeued)
+        db.commit()
+
+    finally:
+        db.close()
+
+
+class JobContext:
+    def __init__(self, job_id: int, attempt: int):
+        self.id = job_id
+        self.attempt = attempt
+
+    def progress(self, done: float, total: float = None, message: str = None):
+        values = {}
+        if total:
+            values["progress"] = min(done / total, 1)
+        if message is not None:
+            values["message"] = message
+
+        db = SessionLocal()
+        try:
+            updated = db.execute(
+                update(Job).where(Job.id == self.id, Job.status == "running").values(locked_at=func.now(), **values)
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+
+        if not updated:
+            raise JobCancelled()
+
+
+def run_job(claimed):
+    definition = TASKS.get(claimed.name)
+    if definition is None:
+        finish_job(claimed.id, {"status": "failed", "error": "Unknown task", "finished_at": func.now()}, "failed")
+        return
+
+    try:
+        result = definition["handler"](JobContext(claimed.id, claimed.attempts), **claimed.payload)
+    except JobCancelled:
+        return
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", claimed.id, claimed.name)
+        if claimed.attempts < claimed.max_attempts:
+            delay = settings.job_retry_seconds * 2 ** (claimed.attempts - 1)
+            finish_job(claimed.id, {
+                "status": "queued",
+                "error": repr(e),
+                "run_at": seconds_from_now(delay)
+            }, "queued")
+        else:
+            finish_job(claimed.id, {"status": "failed", "error": repr(e), "finished_at": func.now()}, "failed")
+        return
+
+    finish_job(claimed.id, {
+        "status": "succeeded",
+        "progress": 1,
+        "result": result,
+        "error": None,
+        "finished_at": func.now()
+    }, "succeeded")
+
+
+class JobRunner:
+    def __init__(self, concurrency: dict, poll_seconds: float, lease_seconds: int):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.wakeups = {}
+        self.tasks = []
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for queue, limit in self.concurrency.items():
+            self.wakeups[queue] = asyncio.Event()
+            self.tasks += [loop.create_task(self.work(queue)) for _ in range(limit)]
+
+        if self.tasks:
+            self.tasks.append(loop.create_task(self.listen()))
+            self.tasks.append(loop.create_task(self.reap()))
+
+    async def listen(self):
+        # job events arrive through the shared LISTEN connection; any of them is a hint to poll now
+        events = broker.subscribe({"job"})
+        try:
+            while True:
+                if await events.get() is None:
+                    events = broker.subscribe({"job"})
+                for wakeup in self.wakeups.values():
+                    wakeup.set()
+        finally:
+            broker.unsubscribe(events)
+
+    async def work(self, queue: str):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(claim_job, queue, self.worker_id)
+            except Exception:
+                logger.exception("Could not claim a job from %s", queue)
+                claimed = None
+
+            if claimed is None:
+                self.wakeups[queue].clear()
+                try:
+                    await asyncio.wait_for(self.wakeups[queue].wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            running = asyncio.ensure_future(asyncio.to_thread(run_job, claimed))
+            while not running.done():
+                await asyncio.wait({running}, timeout=self.lease_seconds / 4)
+                if running.done():
+                    break
+                try:
+                    await asyncio.to_thread(renew_lease, claimed.id)
+                except Exception:
+                    logger.exception("Could not renew the lease of job %s", claimed.id)
+
+            if running.exception():
+                logger.error("Job %s could not be finalized", claimed.id, exc_info=running.exception())
+
+    async def reap(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 4)
+            try:
+                await asyncio.to_thread(requeue_stale_jobs, self.lease_seconds)
+            except Exception:
+                logger.exception("Could not requeue stale jobs")
+
+    def stop(self):
+        for running in self.tasks:
+            running.cancel()
+        self.tasks = []
+
+
+job_runner = JobRunner(settings.job_concurrency, settings.job_poll_seconds, settings.job_lease_seconds)
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+from configs.database import SessionLocal
+from contract.jobs.archive_contracts import archive_contracts
+from contract.jobs.interest_accrual import run_interest_accrual
+from contract.jobs.roll_due_dates import roll_due_dates
+from customer.jobs.month_end_statements import run_month_end_statements
+from utils.contract_schedule import local_today
+from utils.dashboard_stats import rebuild_dashboard_stats
+from utils.job_queue import JobContext, task
+
+
+@task("dashboard.rebuild", queue="reports", max_attempts=1)
+def rebuild_dashboard(job: JobContext):
+    db = SessionLocal()
+    try:
+        rebuild_dashboard_stats(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+@task("contract.interest_accrual", queue="reports")
+def interest_accrual(job: JobContext, as_of: str = None, chunk_size: int = 50000, workers: int = 1):
+    as_of = date.fromisoformat(as_of) if as_of else local_today()
+    rows, overdue = run_interest_accrual(as_of, chunk_size, workers, job.progress)
+    return {"as_of": as_of.isoformat(), "rows": rows, "overdue": overdue}
+
+
+@task("contract.roll_due_dates", queue="reports")
+def roll_contract_due_dates(job: JobContext, on_date: str = None, batch_size: int = 5000):
+    on_date = date.fromisoformat(on_date) if on_date else local_today()
+    return {"on_date": on_date.isoformat(), "rolled": roll_due_dates(on_date, batch_size)}
+
+
+@task("contract.archive", queue="reports", max_attempts=1)
+def archive_contract_partitions(job: JobContext, before_year: int = None, include_unpaid: bool = False):
+    archived = archive_contracts(before_year or local_today().year - 2, include_unpaid)
+    return {str(year): rows for year, rows in archived.items()}
+
+
+@task("customer.month_end_statements", queue="reports")
+def month_end_statements(job: JobContext, month: str = None, batch_size: int = 1000, workers: int = 4, restart: bool = False):
+    month = date.fromisoformat(month) if month else local_today().replace(day=1) - timedelta(days=1)
+    checkpoint = run_month_end_statements(month, batch_size, workers, restart and job.attempt == 1, job.progress)
+    return {"month": f"{month:%Y-%m}", "statements": checkpoint["statements"], "contracts": checkpoint["contracts"]}
@@ -0,0 +1,113 @@
+import math
+import time
+from collections import OrderedDict
+from sqlalchemy import case, delete, select
+from sqlalchemy.orm import Session
+from authen.models.login_failure import LoginFailure
+from configs.conf import settings
+from configs.database import upsert
+
+
+class LoginThrottle:
+    # approximate sliding window: the previous fixed window's count is weighted by how much of it still overlaps
+    def __init__(self, window_seconds: int, max_keys: int, shared: bool = False):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.shared = shared
+        self.counters = OrderedDict()
+        self.purged_window = None
+
+    def keys(self, username: str, client_ip: str = None):
+        keys = {f"user:{username.strip().lower()}": settings.login_max_failures_per_user}
+        if client_ip:
+            keys[f"ip:{client_ip}"] = settings.login_max_failures_per_ip
+        return keys
+
+    def estimate(self, window_index: int, count: int, previous_count: int, now: float):
+        current = int(now // self.window_seconds)
+        if window_index == current - 1:
+            count, previous_count = 0, count
+        elif window_index != current:
+            return 0
+
+        overlap = 1 - (now % self.window_seconds) / self.window_seconds
+        return count + previous_count * overlap
+
+    def retry_after(self, now: float):
+        return math.ceil(self.window_seconds - now % self.window_seconds)
+
+    def check(self, db: Session, keys: dict):
+        now = time.time()
+        counters = [(self.counters.get(key), limit) for key, limit in keys.items()]
+        if any(counter and self.estimate(*counter, now) >= limit for counter, limit in counters):
+            return self.retry_after(now), True
+
+        has_failures = any(counter for counter, limit in counters)
+        if not self.shared:
+            return 0, has_failures
+
+        rows = db.execute(
+            select(LoginFailure.key, LoginFailure.window_index, LoginFailure.count, LoginFailure.previous_count).where(
+                LoginFailure.key.in_(list(keys))
+            )
+        ).all()
+        if any(self.estimate(row.window_index, row.count, row.previous_count, now) >= keys[row.key] for row in rows):
+            return self.retry_after(now), True
+
+        return 0, has_failures or bool(rows)
+
+    def fail(self, db: Session, keys: dict):
+        now = time.time()
+        current = int(now // self.window_seconds)
+        for key in keys:
+            window_index, count, previous_count = self.counters.pop(key, (current, 0, 0))
+            if window_index == current - 1:
+                window_index, count, previous_count = current, 0, count
+            elif window_index != current:
+                window_index, count, previous_count = current, 0, 0
+            self.counters[key] = (window_index, count + 1, previous_count)
+
+        while len(self.counters) > self.max_keys:
+            self.counters.popitem(last=False)
+
+        if self.shared:
+            self.fail_shared(db, keys, current)
+
+    def fail_shared(self, db: Session, keys: dict, current: int):
+        stmt = upsert(LoginFailure).values([
+            {"key": key, "window_index": current, "count": 1, "previous_count": 0}
+            for key in sorted(keys)
+        ])
+        same_window = LoginFailure.window_index == stmt.excluded.window_index
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LoginFailure.key],
+            set_={
+                "previous_count": case(
+                    (same_window, LoginFailure.previous_count),
+                    (LoginFailure.window_index == stmt.excluded.window_index - 1, LoginFailure.count),
+                    else_=0
+                ),
+                "count": case((same_window, LoginFailure.count + 1), else_=1),
+                "window_index": stmt.excluded.window_index
+            }
+        )
+        db.execute(stmt)
+
+        if self.purged_window != current:
+            db.execute(delete(LoginFailure).where(LoginFailure.window_index < current - 1))
+            self.purged_window = current
+        db.commit()
+
+    def succeed(self, db: Session, username: str):
+        key = f"user:{username.strip().lower()}"
+        self.counters.pop(key, None)
+        if self.shared:
+            db.execute(delete(LoginFailure).where(LoginFailure.key == key))
+            db.commit()
+
+
+login_throttle = LoginThrottle(
+    settings.login_window_seconds,
+    settings.login_throttle_max_keys,
+    settings.login_throttle_shared
+)
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from configs.conf import settings
+from configs.database import engine
+
+
+pool = None
+
+
+def init_worker():
+    # connections inherited from the parent process must not be reused after fork
+    engine.dispose(close=False)
+
+
+def get_process_pool():
+    global pool
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=settings.process_pool_workers, initializer=init_worker)
+    return pool
+
+
+async def run_in_pool(function, *args):
+    return await asyncio.wrap_future(get_process_pool().submit(function, *args))
+
+
+async def map_in_pool(function, items, *args):
+    executor = get_process_pool()
+    return await asyncio.gather(*[asyncio.wrap_future(executor.submit(function, item, *args)) for item in items])
+
+
+def shutdown_process_pool():
+    global pool
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+        pool = None
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from fastapi import HTTPException
+from pyinstrument import Profiler
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+from configs.authentication import verify_access_token
+from configs.conf import settings
+from configs.database import SessionLocal, engine
+from user.models.user import User
+
+
+PROFILE_HEADER = "x-profile"
+sql_timeline = ContextVar("sql_timeline", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if sql_timeline.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timeline = sql_timeline.get()
+    if timeline is None or not conn.info.get("profile_started"):
+        return
+
+    started = conn.info["profile_started"].pop()
+    timeline["statements"].append({
+        "start_ms": round((started - timeline["started"]) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "statement": statement,
+        "rows": cursor.rowcount
+    })
+
+
+def is_admin_request(headers: Headers):
+    authorization = headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return False
+
+    try:
+        token = verify_access_token(authorization[7:], HTTPException(status_code=401))
+    except HTTPException:
+        return False
+
+    db = SessionLocal()
+    try:
+        return db.query(User.role).filter(User.id == token.user_id).scalar() == "admin"
+    finally:
+        db.close()
+
+
+def profile_name(scope):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{scope['method'].lower()}-{slug}"
+
+
+def write_profile(name: str, profiler: Profiler, timeline: dict, scope, status_code: int):
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    session = profiler.last_session
+
+    if settings.profiling_format == "html":
+        profile_file, content = f"{name}.html", profiler.output(HTMLRenderer())
+    else:
+        profile_file, content = f"{name}.speedscope.json", profiler.output(SpeedscopeRenderer())
+
+    with open(os.path.join(settings.profiling_dir, profile_file), "w", encoding="utf-8") as f:
+        f.write(content)
+
+    with open(os.path.join(settings.profiling_dir, f"{name}.sql.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "method": scope["method"],
+            "path": scope["path"],
+            "query_string": scope["query_string"].decode("latin-1"),
+            "status_code": status_code,
+            "duration_ms": round(session.duration * 1000, 3),
+            "sql_count": len(timeline["statements"]),
+            "sql_ms": round(sum(statement["duration_ms"] for statement in timeline["statements"]), 3),
+            "statements": timeline["statements"]
+        }, f, ensure_ascii=False, indent=2)
+
+
+class ProfilingMiddleware:
+    # only installed when settings.profiling_enabled, so production requests pay nothing otherwise
+    def __init__(self, app):
+        self.app = app
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        sampled = random.random() < settings.profiling_sample_rate
+        if not sampled and not (headers.get(PROFILE_HEADER) and await asyncio.to_thread(is_admin_request, headers)):
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope)
+        response = {"status_code": 500}
+        timeline = {"started": time.perf_counter(), "statements": []}
+        token = sql_timeline.set(timeline)
+        profiler = Profiler(interval=settings.profiling_interval, async_mode="enabled")
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                response["status_code"] = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            sql_timeline.reset(token)
+            await asyncio.to_thread(write_profile, name, profiler, timeline, scope, response["status_code"])
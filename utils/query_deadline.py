@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from configs.conf import settings
+from utils.admission import route_class
+from utils.slow_queries import current_route, request_scope
+
+
+logger = logging.getLogger(__name__)
+
+request_work = ContextVar("request_work", default=None)
+
+
+class RequestCancelled(SQLAlchemyError):
+    pass
+
+
+class RequestWork:
+    def __init__(self):
+        self.connections = {}
+        self.cancelled = False
+        # the worker thread registers and releases connections while the event loop cancels them
+        self.lock = threading.Lock()
+
+    def cancel_if_registered(self, session, dbapi_connection):
+        # checked under the lock, a released connection may already be running another request's statement
+        with self.lock:
+            if self.connections.get(session) is not dbapi_connection:
+                return False
+            cancel_connection(dbapi_connection)
+            return True
+
+
+class DeadlineStats:
+    def __init__(self):
+        self.disconnects = 0
+        self.cancelled_queries = 0
+        self.statement_timeouts = 0
+
+    def as_dict(self):
+        return {
+            "disconnects": self.disconnects,
+            "cancelled_queries": self.cancelled_queries,
+            "statement_timeouts": self.statement_timeouts
+        }
+
+
+deadline_stats = DeadlineStats()
+
+
+def statement_timeout_ms(scope):
+    # a route template can override the budget of its class, e.g. "GET /contract/all"
+    route = current_route()
+    if route in settings.statement_timeout_ms:
+        return settings.statement_timeout_ms[route]
+
+    return settings.statement_timeout_ms.get(route_class(scope))
+
+
+def cancel_connection(dbapi_connection):
+    # psycopg2 sends a cancel request for the running statement, like pg_cancel_backend(); sqlite3 interrupts it
+    cancel = getattr(dbapi_connection, "cancel", None) or dbapi_connection.interrupt
+    cancel()
+
+
+def apply_request_deadline(session, transaction, connection):
+    work = request_work.get()
+    if work is None:
+        return
+
+    if connection.dialect.name == "postgresql":
+        timeout = statement_timeout_ms(request_scope.get())
+        if timeout:
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+    with work.lock:
+        work.connections[session] = connection.connection.dbapi_connection
+
+
+def release_request_connection(session, transaction):
+    # once the transaction ends the connection may serve another request, so it must not be cancelled any more
+    work = request_work.get()
+    if work is not None and transaction.parent is None:
+        with work.lock:
+            work.connections.pop(session, None)
+
+
+def refuse_cancelled_request(conn, cursor, statement, parameters, context, executemany):
+    work = request_work.get()
+    if work is not None and work.cancelled:
+        raise RequestCancelled("Client disconnected")
+
+
+def count_statement_timeout(exception_context):
+    if getattr(exception_context.original_exception, "pgcode", None) == "57014" and "statement timeout" in str(exception_context.original_exception):
+        deadline_stats.statement_timeouts += 1
+
+
+def install_query_deadline_hooks(engine, session_factory):
+    event.listen(engine, "before_cursor_execute", refuse_cancelled_request, insert=True)
+    event.listen(engine, "handle_error", count_statement_timeout)
+    event.listen(session_factory, "after_begin", apply_request_deadline)
+    event.listen(session_factory, "after_transaction_end", release_request_connection)
+
+
+class QueryDeadlineMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or route_class(scope) is None:
+            await self.app(scope, receive, send)
+            return
+
+        work = RequestWork()
+        token = request_work.set(work)
+        # a single reader owns the ASGI receive channel; the one-slot queue keeps request bodies flow-controlled
+        messages = asyncio.Queue(maxsize=1)
+        disconnected = asyncio.Event()
+        response_done = False
+
+        async def read_messages():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    if not response_done:
+                        await self.cancel(work, app_task)
+                    if messages.empty():
+                        messages.put_nowait(message)
+                    return
+                await messages.put(message)
+
+        async def app_receive():
+            if disconnected.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def app_send(message):
+            nonlocal response_done
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_done = True
+            await send(message)
+
+        app_task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+        reader = asyncio.ensure_future(read_messages())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            if not (work.cancelled and app_task.done()):
+                app_task.cancel()
+                raise
+        finally:
+            reader.cancel()
+            request_work.reset(token)
+
+    async def cancel(self, work: RequestWork, app_task: asyncio.Task):
+        work.cancelled = True
+        deadline_stats.disconnects += 1
+        with work.lock:
+            connections = list(work.connections.items())
+        for session, dbapi_connection in connections:
+            try:
+                if await asyncio.to_thread(work.cancel_if_registered, session, dbapi_connection):
+                    deadline_stats.cancelled_queries += 1
+            except Exception:
+                logger.exception("Could not cancel the query of a disconnected request")
+
+        # endpoints running in the threadpool finish their (now cancelled) call before the task unwinds
+        app_task.cancel()
@@ -0,0 +1,141 @@
+import asyncio
+from urllib.parse import parse_qsl, urlencode
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from configs.conf import settings
+
+
+COALESCED_PREFIXES = ("/customer", "/contract", "/user")
+
+
+class Flight:
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.response = None
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self, max_keys: int, max_body_bytes: int):
+        self.max_keys = max_keys
+        self.max_body_bytes = max_body_bytes
+        self.flights = {}
+        self.leaders = 0
+        self.shared = 0
+        self.retried = 0
+        self.bypassed = 0
+        self.oversized = 0
+        self.saved_bytes = 0
+
+    def stats(self):
+        return {
+            "max_keys": self.max_keys,
+            "max_body_bytes": self.max_body_bytes,
+            "in_flight": len(self.flights),
+            "waiting": sum(flight.followers for flight in self.flights.values()),
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "retried": self.retried,
+            "bypassed": self.bypassed,
+            "oversized": self.oversized,
+            "saved_bytes": self.saved_bytes
+        }
+
+
+single_flight = SingleFlight(settings.single_flight_max_keys, settings.single_flight_max_body_bytes)
+
+
+def auth_scope(headers: Headers):
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if not scheme and not token:
+        # the customer and contract routers do not authenticate, so terminals without a token share a scope too
+        return "anonymous"
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=settings.algorithm)
+    except JWTError:
+        return None
+
+    # the routes that authenticate only check that the caller is logged in, they never filter by user
+    return "user" if payload.get("user_id") else None
+
+
+def flight_key(scope):
+    if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(COALESCED_PREFIXES):
+        return None
+
+    headers = Headers(scope=scope)
+    auth = auth_scope(headers)
+    if auth is None:
+        return None
+
+    query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+    return (scope["path"], query, headers.get("accept", ""), headers.get("if-none-match", ""), auth)
+
+
+class SingleFlightMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        key = flight_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        flight = single_flight.flights.get(key)
+        if flight is not None:
+            flight.followers += 1
+            await flight.done.wait()
+            if flight.response is not None:
+                start, body = flight.response
+                single_flight.shared += 1
+                single_flight.saved_bytes += len(body)
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            # the leader failed, streamed too much or was cancelled: run the request ourselves
+            single_flight.retried += 1
+            await self.app(scope, receive, send)
+            return
+
+        if len(single_flight.flights) >= single_flight.max_keys:
+            single_flight.bypassed += 1
+            await self.app(scope, receive, send)
+            return
+
+        flight = Flight()
+        single_flight.flights[key] = flight
+        single_flight.leaders += 1
+
+        start = None
+        chunks = []
+        size = 0
+        shareable = True
+
+        async def send_wrapper(message):
+            nonlocal start, size, shareable
+            if message["type"] == "http.response.start":
+                start = message
+                shareable = message["status"] == 200
+            elif message["type"] == "http.response.body" and shareable:
+                size += len(message.get("body", b""))
+                if size > single_flight.max_body_bytes:
+                    shareable = False
+                    single_flight.oversized += 1
+                    chunks.clear()
+                else:
+                    chunks.append(message.get("body", b""))
+
+                if not message.get("more_body", False) and shareable:
+                    flight.response = (start, b"".join(chunks))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            del single_flight.flights[key]
+            flight.done.set()
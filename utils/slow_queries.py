@@ -0,0 +1,134 @@
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from sqlalchemy import event
+from configs.conf import settings
+
+
+request_scope = ContextVar("request_scope", default=None)
+captures = deque(maxlen=settings.slow_query_buffer_size)
+explained_at = OrderedDict()
+explain_lock = threading.Lock()
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+UNSAFE_TO_REPEAT = re.compile(r"\b(pg_notify|nextval|setval|FOR\s+UPDATE|FOR\s+SHARE|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+
+def current_route():
+    scope = request_scope.get()
+    if scope is None:
+        return None
+
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route else scope['path']}"
+
+
+def value_shape(value):
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameters_shape(parameters, executemany: bool):
+    if executemany:
+        return {"rows": len(parameters), "row": parameters_shape(parameters[0], False) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [value_shape(value) for value in parameters]
+    return None
+
+
+def should_explain(statement: str, context, executemany: bool):
+    if not settings.slow_query_explain or executemany:
+        return False
+    if context is not None and context.execution_options.get("stream_results"):
+        return False
+    if not EXPLAINABLE.match(statement) or UNSAFE_TO_REPEAT.search(statement):
+        return False
+    if random.random() >= settings.slow_query_explain_rate:
+        return False
+
+    # explain each distinct statement at most once per interval, whatever the traffic
+    now = time.monotonic()
+    with explain_lock:
+        last = explained_at.get(statement)
+        if last is not None and now - last < settings.slow_query_explain_interval:
+            return False
+        explained_at[statement] = now
+        explained_at.move_to_end(statement)
+        while len(explained_at) > settings.slow_query_buffer_size:
+            explained_at.popitem(last=False)
+
+    return True
+
+
+def explain(conn, statement: str, parameters):
+    # EXPLAIN ANALYZE runs the query again inside the caller's transaction, so a failure must not abort it
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.slow_query_ms:
+        return
+
+    captures.append({
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "route": current_route(),
+        "duration_ms": round(duration_ms, 3),
+        "statement": statement,
+        "parameters": parameters_shape(parameters, executemany),
+        "rows": cursor.rowcount,
+        "plan": explain(conn, statement, parameters) if conn.dialect.name == "postgresql" and should_explain(statement, context, executemany) else None
+    })
+
+
+def handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def install_slow_query_hooks(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+class RequestScopeMiddleware:
+    # the router fills scope["route"] in place, so hooks can name the route template once it is matched
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
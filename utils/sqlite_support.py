@@ -0,0 +1,106 @@
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+import pytz
+from sqlalchemy import Date, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import Cast
+from sqlalchemy.sql.functions import next_value
+from configs.conf import settings
+
+
+sequence_lock = threading.Lock()
+last_sequence_value = 0
+
+
+def unaccent(value):
+    if value is None:
+        return None
+    value = value.replace("đ", "d").replace("Đ", "D")
+    return "".join(char for char in unicodedata.normalize("NFD", value) if not unicodedata.combining(char))
+
+
+def nextval(name):
+    # SQLite has no sequences: a microsecond clock that never goes backwards keeps change_seq unique and ordered
+    global last_sequence_value
+    with sequence_lock:
+        last_sequence_value = max(last_sequence_value + 1, time.time_ns() // 1000)
+        return last_sequence_value
+
+
+def next_change_seq():
+    # SQLite lets one writer in at a time, so change_seq values already become visible in the order they are taken
+    return nextval("change_seq")
+
+
+def greatest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def word_similarity(term, value):
+    if not term or not value:
+        return 0.0
+    match = SequenceMatcher(None, term, value, autojunk=False).find_longest_match(0, len(term), 0, len(value))
+    return match.size / len(term)
+
+
+def to_timezone(zone, value):
+    if value is None:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(pytz.timezone(zone)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def date_trunc(unit, value):
+    if value is None:
+        return None
+    moment = datetime.fromisoformat(value)
+    if unit == "month":
+        moment = moment.replace(day=1)
+    elif unit == "year":
+        moment = moment.replace(month=1, day=1)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def on_connect(dbapi_connection, connection_record):
+    dbapi_connection.create_function("f_unaccent", 1, unaccent, deterministic=True)
+    dbapi_connection.create_function("nextval", 1, nextval)
+    dbapi_connection.create_function("next_change_seq", 0, next_change_seq)
+    dbapi_connection.create_function("greatest", -1, greatest, deterministic=True)
+    dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
+    dbapi_connection.create_function("timezone", 2, to_timezone, deterministic=True)
+    dbapi_connection.create_function("date_trunc", 2, date_trunc, deterministic=True)
+
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_bytes}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_kb}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_support(engine):
+    event.listen(engine, "connect", on_connect)
+
+
+@compiles(next_value, "sqlite")
+def compile_next_value(element, compiler, **kw):
+    return f"nextval('{element.sequence.name}')"
+
+
+@compiles(Cast, "sqlite")
+def compile_cast(element, compiler, **kw):
+    # SQLite has no DATE type, CAST(... AS DATE) would turn '2024-05-01' into the number 2024
+    if isinstance(element.type, Date):
+        return f"date({compiler.process(element.clause, **kw)})"
+    return compiler.visit_cast(element, **kw)
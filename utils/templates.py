@@ -0,0 +1,138 @@
+import hashlib
+import io
+import os
+import zipfile
+from mako.lookup import TemplateLookup
+from configs.conf import settings
+from utils.contract_schedule import compute_total_due
+from utils.process_pool import map_in_pool
+
+
+DOCUMENT_FORMATS = {
+    "html": ("contract_agreement.html.mako", "text/html; charset=utf-8"),
+    "docx": ("contract_agreement.docx.xml.mako", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+}
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+# templates are compiled to python modules once, kept in memory and on disk for the other workers
+template_lookup = TemplateLookup(
+    directories=[settings.template_dir],
+    module_directory=settings.template_cache_dir,
+    default_filters=["str", "h"],
+    input_encoding="utf-8"
+)
+
+
+def template_version(document_format: str):
+    return os.stat(os.path.join(settings.template_dir, DOCUMENT_FORMATS[document_format][0])).st_mtime_ns
+
+
+def format_money(value):
+    return f"{value or 0:,}".replace(",", ".") + " đồng"
+
+
+def format_date(value):
+    return value.strftime("%d/%m/%Y") if value else ""
+
+
+def contract_document_context(contract):
+    customer = contract.customer
+    return {
+        "contract_number": contract.contract_number,
+        "signed_date": format_date(contract.start_date or contract.created_at),
+        "lender_name": settings.document_lender_name,
+        "customer": {
+            "full_name": customer.full_name,
+            "cccd": customer.cccd,
+            "phone_number": customer.phone_number,
+            "address": customer.address
+        },
+        "terms": [
+            ("Số tiền vay", format_money(contract.loan)),
+            ("Lãi suất", f"{contract.interest_rate or 0:g}%"),
+            ("Thời hạn vay", f"{contract.duration or 0} ngày"),
+            ("Ngày bắt đầu", format_date(contract.start_date)),
+            ("Kỳ thanh toán", f"{contract.period or 1} ngày/lần"),
+            ("Số tiền trả mỗi ngày", format_money(contract.daily_payment)),
+            ("Tổng số tiền phải trả", format_money(compute_total_due(contract.loan, contract.duration, contract.daily_payment)))
+        ]
+    }
+
+
+def document_version(contract, document_format: str):
+    parts = (contract.id, contract.change_seq, contract.customer.change_seq, template_version(document_format), settings.document_lender_name)
+    return hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+
+def render_contract_document(context: dict, document_format: str):
+    template_name, _ = DOCUMENT_FORMATS[document_format]
+    rendered = template_lookup.get_template(template_name).render(**context).encode("utf-8")
+    if document_format != "docx":
+        return rendered
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", DOCX_RELATIONSHIPS)
+        docx.writestr("word/document.xml", rendered)
+    return buffer.getvalue()
+
+
+def cached_document_path(contract, document_format: str, version: str):
+    return os.path.join(settings.document_cache_dir, str(contract.id), f"{version}.{document_format}")
+
+
+def read_cached_document(path: str):
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_cached_document(path: str, content: bytes):
+    # one file per contract and format: older versions are dropped when a new one is rendered
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    for old_name in os.listdir(directory):
+        if old_name != name and old_name.endswith(os.path.splitext(name)[1]):
+            os.remove(os.path.join(directory, old_name))
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+
+async def contract_documents(contracts: list, document_format: str):
+    documents = {}
+    misses = []
+    for contract in contracts:
+        path = cached_document_path(contract, document_format, document_version(contract, document_format))
+        documents[contract.id] = read_cached_document(path)
+        if documents[contract.id] is None:
+            misses.append((contract, path))
+
+    if misses:
+        rendered = await map_in_pool(render_contract_document, [contract_document_context(contract) for contract, _ in misses], document_format)
+        for (contract, path), content in zip(misses, rendered):
+            write_cached_document(path, content)
+            documents[contract.id] = content
+
+    return [documents[contract.id] for contract in contracts]